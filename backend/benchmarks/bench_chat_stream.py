@@ -0,0 +1,85 @@
+"""Time-to-first-byte for concurrent chats: buffered replies vs SSE-style streaming.
+
+Uses the local fake Gemini server and an in-memory catalog, so no Mongo or
+API key is needed. Run from the backend directory:
+
+    python -m benchmarks.bench_chat_stream --chats 50 --concurrency 25
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from typing import Any, Dict, List
+
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("JWT_SECRET", "benchmark-secret")
+os.environ.setdefault("GEMINI_API_KEY", "fake-key")
+
+from benchmarks.common import latency_summary, print_table, write_json
+from benchmarks.fake_llm_server import run_fake_llm_server
+from chatbot.smart_diet_bot import get_response_cache, handle_chat_message, stream_chat_message
+from utils.food_catalog import build_snapshot, get_food_catalog
+from utils.llm_client import close_llm_client
+from utils.seed_data import _generate_food_documents
+
+
+async def _run(chats: int, concurrency: int) -> Dict[str, Dict[str, Any]]:
+    get_food_catalog().prime(build_snapshot(_generate_food_documents()))
+    semaphore = asyncio.Semaphore(concurrency)
+    results = {}
+
+    for mode in ("buffered", "streaming"):
+        get_response_cache().clear()
+        first_byte: List[float] = []
+        complete: List[float] = []
+
+        async def chat(index: int) -> None:
+            message = f"Suggest a high protein vegan lunch, variant {index}"
+            async with semaphore:
+                started = time.perf_counter()
+                if mode == "buffered":
+                    await handle_chat_message(message, None)
+                    first_byte.append(time.perf_counter() - started)
+                else:
+                    first_chunk_at = None
+                    async for _chunk in stream_chat_message(message, None):
+                        if first_chunk_at is None:
+                            first_chunk_at = time.perf_counter() - started
+                    first_byte.append(first_chunk_at)
+                complete.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(chat(index) for index in range(chats)))
+        ttfb = latency_summary(first_byte)
+        total = latency_summary(complete)
+        results[mode] = {
+            "chats": len(complete),
+            "ttfbP50Ms": ttfb["p50Ms"],
+            "ttfbP99Ms": ttfb["p99Ms"],
+            "totalP50Ms": total["p50Ms"],
+            "totalP99Ms": total["p99Ms"],
+        }
+
+    await close_llm_client()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chats", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=25)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--json", help="Write results to this path")
+    args = parser.parse_args()
+
+    with run_fake_llm_server(args.port, latency_ms=args.latency_ms) as api_root:
+        os.environ["GEMINI_API_ROOT"] = api_root
+        results = asyncio.run(_run(args.chats, args.concurrency))
+
+    print_table(f"{args.chats} chats at concurrency {args.concurrency}", results)
+    write_json(args.json, {"benchmark": "chat_stream", "results": results})
+
+
+if __name__ == "__main__":
+    main()
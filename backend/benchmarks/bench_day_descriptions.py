@@ -0,0 +1,76 @@
+"""Latency of 7-day plan descriptions: serial calls vs bounded concurrent fan-out.
+
+Starts a local fake Gemini server, so no API key or network is needed. Run from
+the backend directory:
+
+    python -m benchmarks.bench_day_descriptions --latency-ms 300 --rounds 5
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from typing import Any, Dict, List
+
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("JWT_SECRET", "benchmark-secret")
+os.environ.setdefault("GEMINI_API_KEY", "fake-key")
+
+from benchmarks.common import latency_summary, print_table, write_json
+from benchmarks.fake_llm_server import run_fake_llm_server
+from utils.diet_generator import DAYS_OF_WEEK, _attach_day_descriptions, _maybe_generate_day_description
+from utils.llm_client import close_llm_client
+
+
+def _week() -> List[Dict[str, Any]]:
+    return [
+        {
+            "day": day,
+            "meals": {"breakfast": ["Oats"], "lunch": ["Lentil Bowl"], "dinner": ["Tofu Stir-Fry"], "snacks": ["Nuts"]},
+            "totalCalories": 2000,
+        }
+        for day in DAYS_OF_WEEK
+    ]
+
+
+async def _serial(week: List[Dict[str, Any]]) -> None:
+    for day_payload in week:
+        description = await _maybe_generate_day_description(day_payload)
+        if description:
+            day_payload["description"] = description
+
+
+async def _run(rounds: int) -> Dict[str, Dict[str, Any]]:
+    results = {}
+    for name, describe in (("serial", _serial), ("concurrent", _attach_day_descriptions)):
+        latencies = []
+        described = 0
+        for _ in range(rounds):
+            week = _week()
+            started = time.perf_counter()
+            await describe(week)
+            latencies.append(time.perf_counter() - started)
+            described += sum("description" in day for day in week)
+        results[name] = {**latency_summary(latencies), "described": f"{described}/{rounds * len(DAYS_OF_WEEK)}"}
+    await close_llm_client()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--json", help="Write results to this path")
+    args = parser.parse_args()
+
+    with run_fake_llm_server(args.port, latency_ms=args.latency_ms) as api_root:
+        os.environ["GEMINI_API_ROOT"] = api_root
+        results = asyncio.run(_run(args.rounds))
+
+    print_table(f"7 day descriptions, fake LLM latency {args.latency_ms} ms", results)
+    write_json(args.json, {"benchmark": "day_descriptions", "results": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Cold-load time and peak RSS of the FDC tables: CSV parsing vs the compiled NumPy snapshot.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_fdc_snapshot --runs 5
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks.common import print_table, write_json
+from utils.fdc_tables import FdcReader, compile_snapshot
+
+# Each mode runs in a fresh interpreter so imports, page cache aside, start cold.
+_CHILD = """
+import json, resource, sys, time
+from pathlib import Path
+import numpy as np
+from utils.fdc_tables import FdcReader, FdcSnapshot
+
+def rss_kb():
+    status = Path("/proc/self/status")
+    if status.exists():
+        for line in status.read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+mode, snapshot_dir = sys.argv[1], Path(sys.argv[2])
+before = rss_kb()
+started = time.perf_counter()
+loaded = []
+if mode == "csv":
+    source = FdcReader()
+elif mode.startswith("snapshot"):
+    source = FdcSnapshot(snapshot_dir)
+if mode == "snapshot-arrays":
+    # What a long-lived process keeps: the mapped arrays, queried in place.
+    loaded += [int(table[table.dtype.names[0]].sum()) for table in source.tables.values()]
+elif mode != "baseline":
+    ids = set(source.foundation_ids())
+    loaded += [
+        source.food_details(ids),
+        source.categories(),
+        source.calorie_factors(ids),
+        source.default_portions(ids),
+        source.macros_per_100g(ids),
+        source.sub_samples(),
+    ]
+elapsed = time.perf_counter() - started
+after = rss_kb()
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"seconds": elapsed, "rssKb": after, "rssDeltaKb": after - before, "peakRssKb": peak}))
+"""
+
+
+def _run(mode: str, snapshot_dir: Path) -> Dict[str, float]:
+    output = subprocess.run(
+        [sys.executable, "-c", _CHILD, mode, str(snapshot_dir)],
+        check=True,
+        capture_output=True,
+        text=True,
+        cwd=Path(__file__).resolve().parent.parent,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", help="Write results to this path")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot_dir = Path(tmp)
+        manifest = compile_snapshot(FdcReader(), snapshot_dir)
+        size_kb = sum(path.stat().st_size for path in snapshot_dir.glob("*.npy")) / 1024
+
+        results = {}
+        for mode in ("baseline", "csv", "snapshot", "snapshot-arrays"):
+            samples: List[Dict[str, float]] = [_run(mode, snapshot_dir) for _ in range(args.runs)]
+            results[mode] = {
+                "runs": len(samples),
+                "loadMs": round(statistics.median(s["seconds"] for s in samples) * 1000, 2),
+                "rssMb": round(statistics.median(s["rssKb"] for s in samples) / 1024, 1),
+                "loadRssDeltaMb": round(statistics.median(s["rssDeltaKb"] for s in samples) / 1024, 1),
+                "peakRssMb": round(statistics.median(s["peakRssKb"] for s in samples) / 1024, 1),
+            }
+
+    print(f"Snapshot: {size_kb:.0f} KiB on disk, compiled in {manifest['buildSeconds']}s")
+    print_table("FDC tables cold load (median of fresh interpreters)", results)
+    write_json(args.json, {"benchmark": "fdc_snapshot", "snapshotKiB": size_kb, "results": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Food-name autocomplete and calorie lookup latency over a large synthetic catalog.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_food_search --foods 100000 --queries 2000
+"""
+
+import argparse
+import itertools
+import random
+import re
+import time
+from typing import Any, Callable, Dict, List
+
+from benchmarks.common import latency_summary, print_table, write_json
+from utils.food_catalog import build_snapshot
+from utils.food_search import FoodNameIndex
+from utils.seed_data import _generate_food_documents
+
+_STYLES = ["Classic", "Spicy", "Smoky", "Herbed", "Zesty", "Crispy", "Creamy", "Rustic", "Golden", "Garden", "Street", "Homestyle"]
+_SIZES = ["Mini", "Light", "Regular", "Hearty", "Family", "Double", "Half", "Sharing", "Jumbo"]
+
+
+def _synthetic_documents(count: int) -> List[Dict[str, Any]]:
+    base = _generate_food_documents()
+    documents = []
+    for (style, size), doc in itertools.product(itertools.product(_STYLES, _SIZES), base):
+        documents.append({**doc, "food": f"{style} {size} {doc['food']}"})
+        if len(documents) >= count:
+            break
+    return documents
+
+
+def _queries(names: List[str], count: int, rng: random.Random) -> Dict[str, List[str]]:
+    """Prefixes, mid-name words and single-typo names sampled from the catalog."""
+    prefixes, words, typos = [], [], []
+    for _ in range(count):
+        name = rng.choice(names)
+        prefixes.append(name[: rng.randint(2, 12)])
+        words.append(rng.choice(name.split()[2:])[: rng.randint(3, 8)])
+        position = rng.randrange(len(name))
+        typos.append(name[:position] + rng.choice("aeiourst") + name[position + 1 :])
+    return {"prefix": prefixes, "word": words, "typo": typos}
+
+
+def _measure(fn: Callable[[str], Any], queries: List[str]) -> Dict[str, float]:
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        fn(query)
+        latencies.append(time.perf_counter() - started)
+    return latency_summary(latencies)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--foods", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--scan-queries", type=int, default=50, help="Queries for the regex-scan baseline")
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--json", help="Write results to this path")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    snapshot = build_snapshot(_synthetic_documents(args.foods))
+    started = time.perf_counter()
+    index = FoodNameIndex(snapshot)
+    build_seconds = time.perf_counter() - started
+    queries = _queries(snapshot.names, args.queries, rng)
+
+    def regex_scan(query: str) -> Any:
+        # What an unanchored case-insensitive $regex does server-side: test every name.
+        pattern = re.compile(re.escape(query), re.IGNORECASE)
+        return next((name for name in snapshot.names if pattern.search(name)), None)
+
+    results = {
+        "autocomplete/prefix": _measure(index.autocomplete, queries["prefix"]),
+        "autocomplete/word": _measure(index.autocomplete, queries["word"]),
+        "autocomplete/typo": _measure(index.autocomplete, queries["typo"]),
+        "best_match/typo": _measure(index.best_match, queries["typo"]),
+        "regex_scan/typo": _measure(regex_scan, queries["typo"][: args.scan_queries]),
+    }
+
+    print(f"Index build over {snapshot.size} foods: {build_seconds:.2f}s")
+    print_table(f"Food name search ({snapshot.size} foods)", results)
+    write_json(
+        args.json,
+        {"benchmark": "food_search", "foods": snapshot.size, "buildSeconds": build_seconds, "results": results},
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+"""Throughput, latency and allocations of the plan, chat and auth hot paths.
+
+Runs against an in-memory Mongo stand-in (``pip install mongomock-motor``) or,
+with ``--mongo-uri``, a local mongod, plus the local fake Gemini server.
+The in-memory stand-in answers instantly, so user lookups on it wait
+``--db-latency-ms`` to stand in for a mongod round trip. Everything runs in
+the ``hot_path_benchmark`` database, whatever ``MONGO_DB_NAME`` says, and
+the run refuses to drop collections there unless the benchmark created it.
+Run from the backend directory:
+
+    python -m benchmarks.bench_hot_paths --iterations 200 --json before.json
+    python -m benchmarks.bench_hot_paths --iterations 200 --compare before.json
+
+``--compare`` prints the p50 change per case and exits non-zero when any
+case regressed by more than ``--tolerance``. Allocation figures come from a
+separate tracemalloc pass and include the fake server's thread for chat.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+# Always our own database, even from a shell configured for the app: the run drops collections.
+BENCHMARK_DB = "hot_path_benchmark"
+os.environ["MONGO_DB_NAME"] = BENCHMARK_DB
+os.environ.setdefault("JWT_SECRET", "benchmark-secret")
+os.environ.setdefault("GEMINI_API_KEY", "fake-key")
+
+import httpx
+import numpy as np
+from fastapi.security import HTTPAuthorizationCredentials
+from motor.motor_asyncio import AsyncIOMotorClient
+
+import database
+import utils.dependencies
+from benchmarks.common import compare_results, latency_summary, print_table, write_json
+from benchmarks.fake_llm_server import run_fake_llm_server
+from chatbot.smart_diet_bot import get_response_cache, handle_chat_message
+from main import app
+from models.user_model import UserBase, UserInDB
+from utils.dependencies import get_current_user, get_user_cache
+from utils.diet_generator import (
+    _calculate_daily_calories,
+    _choose_meal_items,
+    generate_7day_plan,
+    generate_weekly_plan,
+)
+from utils.food_catalog import get_food_catalog
+from utils.indexes import ensure_indexes
+from utils.jwt_handler import create_access_token
+from utils.llm_client import close_llm_client
+from utils.settings import get_settings
+from utils.request_logging import configure_logging, stop_logging
+from utils.security import hash_password, shutdown_password_pool
+from utils.seed_data import _batches, _generate_food_documents
+from utils.synthetic_data import SYNTHETIC_PASSWORD, iter_synthetic_foods, iter_synthetic_users
+
+Runner = Callable[[int], Awaitable[Any]]
+
+CASES = (
+    "calculate_daily_calories",
+    "choose_meal_items",
+    "generate_weekly_plan",
+    "generate_7day_plan",
+    "get_current_user",
+    "get_current_user_uncached",
+    "handle_chat_message",
+    "register",
+    "login",
+)
+# bcrypt dominates these, so they run fewer iterations.
+_AUTH_CASES = {"register", "login"}
+
+
+class _RoundTripCollection:
+    """Collection wrapper adding a fixed network round trip to ``find_one``."""
+
+    def __init__(self, collection, seconds: float) -> None:
+        self._collection = collection
+        self._seconds = seconds
+
+    async def find_one(self, *args, **kwargs):
+        await asyncio.sleep(self._seconds)
+        return await self._collection.find_one(*args, **kwargs)
+
+    def __getattr__(self, name: str):
+        return getattr(self._collection, name)
+
+
+def _mongo_client(uri: str | None):
+    if uri:
+        return AsyncIOMotorClient(uri, serverSelectionTimeoutMS=5000)
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        sys.exit("mongomock-motor is not installed; pip install mongomock-motor or pass --mongo-uri")
+    return AsyncMongoMockClient()
+
+
+_MARKER_COLLECTION = "_hot_path_benchmark"
+
+
+async def _claim_database(db) -> None:
+    """Refuse to touch a database this benchmark did not create; mark a fresh one as ours."""
+    if db.name != BENCHMARK_DB:
+        sys.exit(f"Refusing to drop collections in {db.name!r}; the benchmark only uses {BENCHMARK_DB!r}")
+    collections = await db.list_collection_names()
+    if collections and _MARKER_COLLECTION not in collections:
+        sys.exit(f"Refusing to drop collections in {db.name!r}: it exists and was not created by this benchmark")
+    await db[_MARKER_COLLECTION].update_one({"_id": "owner"}, {"$set": {"benchmark": "hot_paths"}}, upsert=True)
+
+
+async def _seed(db, foods: int, users: int) -> List[UserInDB]:
+    await _claim_database(db)
+    for name in ("foods", "users", "mealplans"):
+        await db[name].drop()
+    documents = iter_synthetic_foods(foods) if foods else iter(_generate_food_documents())
+    for batch in _batches(documents, 5_000):
+        await db["foods"].insert_many(batch, ordered=False)
+    await ensure_indexes(db)
+
+    profiles = list(iter_synthetic_users(users, password_hash=hash_password(SYNTHETIC_PASSWORD)))
+    result = await db["users"].insert_many(profiles)
+    for profile, user_id in zip(profiles, result.inserted_ids):
+        profile["_id"] = user_id
+    return [UserInDB(**profile) for profile in profiles]
+
+
+async def _measure(run: Runner, iterations: int, warmup: int, alloc_iterations: int) -> Dict[str, Any]:
+    for index in range(warmup):
+        await run(index)
+
+    samples = []
+    offset = warmup
+    for index in range(offset, offset + iterations):
+        started = time.perf_counter()
+        await run(index)
+        samples.append(time.perf_counter() - started)
+    summary = latency_summary(samples)
+
+    peaks, retained = [], []
+    offset += iterations
+    tracemalloc.start()
+    try:
+        for index in range(offset, offset + alloc_iterations):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            await run(index)
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            retained.append(current - before)
+    finally:
+        tracemalloc.stop()
+    if peaks:
+        summary["allocPeakKiB"] = round(sum(peaks) / len(peaks) / 1024, 2)
+        summary["allocRetainedKiB"] = round(sum(retained) / len(retained) / 1024, 2)
+    return summary
+
+
+def _runners(db, users: List[UserInDB], snapshot, http: httpx.AsyncClient) -> Dict[str, Runner]:
+    def user_at(index: int) -> UserInDB:
+        return users[index % len(users)]
+
+    lunch = snapshot.candidates_by_meal(["balanced"])["lunch"]
+    used = np.zeros(snapshot.size, dtype=bool)
+    rng = random.Random(0)
+    tokens = [
+        HTTPAuthorizationCredentials(
+            scheme="Bearer", credentials=create_access_token({"sub": str(user.id), "email": user.email})
+        )
+        for user in users
+    ]
+
+    async def calculate_daily_calories(index: int) -> None:
+        _calculate_daily_calories(user_at(index))
+
+    async def choose_meal_items(index: int) -> None:
+        used[:] = False
+        _choose_meal_items(snapshot, lunch, used, 700, rng)
+
+    async def weekly_plan(index: int) -> None:
+        await generate_weekly_plan(user_at(index), db["foods"])
+
+    async def seven_day_plan(index: int) -> None:
+        await generate_7day_plan(user_at(index), db["foods"])
+
+    async def current_user(index: int) -> None:
+        if index == 0:
+            # Each user is looked up once per len(users) calls; cache them all during warmup.
+            for token in tokens:
+                await get_current_user(token)
+        await get_current_user(tokens[index % len(tokens)])
+
+    async def current_user_uncached(index: int) -> None:
+        get_user_cache().pop(str(user_at(index).id))
+        await get_current_user(tokens[index % len(tokens)])
+
+    async def chat(index: int) -> None:
+        # Each message is new, so every call reaches the (fake) LLM.
+        get_response_cache().clear()
+        message = f"Suggest a high protein {user_at(index).dietType} dinner, variant {index}"
+        await handle_chat_message(message, db["foods"])
+
+    async def register(index: int) -> None:
+        payload = user_at(index).model_dump(include=set(UserBase.model_fields))
+        payload.update(email=f"register{index}@bench.example.com", password=SYNTHETIC_PASSWORD)
+        response = await http.post("/auth/register", json=payload)
+        response.raise_for_status()
+
+    async def login(index: int) -> None:
+        credentials = {"email": user_at(index).email, "password": SYNTHETIC_PASSWORD}
+        response = await http.post("/auth/login", json=credentials)
+        response.raise_for_status()
+
+    return {
+        "calculate_daily_calories": calculate_daily_calories,
+        "choose_meal_items": choose_meal_items,
+        "generate_weekly_plan": weekly_plan,
+        "generate_7day_plan": seven_day_plan,
+        "get_current_user": current_user,
+        "get_current_user_uncached": current_user_uncached,
+        "handle_chat_message": chat,
+        "register": register,
+        "login": login,
+    }
+
+
+async def _run(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    database.mongo_client = _mongo_client(args.mongo_uri)
+    db = database.get_database()
+    users = await _seed(db, args.foods, args.users)
+    if not args.mongo_uri and args.db_latency_ms > 0:
+        users_collection = _RoundTripCollection(db["users"], args.db_latency_ms / 1000)
+        utils.dependencies.get_user_collection = lambda: users_collection
+    snapshot = await get_food_catalog().get(db["foods"])
+
+    results: Dict[str, Dict[str, Any]] = {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as http:
+        runners = _runners(db, users, snapshot, http)
+        for name in args.cases:
+            auth = name in _AUTH_CASES
+            results[name] = await _measure(
+                runners[name],
+                args.auth_iterations if auth else args.iterations,
+                1 if auth else args.warmup,
+                min(args.alloc_iterations, args.auth_iterations) if auth else args.alloc_iterations,
+            )
+            print(f"  {name}: p50 {results[name]['p50Ms']} ms")
+
+    await close_llm_client()
+    shutdown_password_pool()
+    database.close_mongo_connection()
+    stop_logging()
+    return results
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES))
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--alloc-iterations", type=int, default=20)
+    parser.add_argument("--auth-iterations", type=int, default=20)
+    parser.add_argument("--foods", type=int, default=0, help="Synthetic catalog size (default: the seed catalog)")
+    parser.add_argument("--users", type=int, default=180)
+    parser.add_argument("--mongo-uri", default=None, help="Local mongod to use instead of mongomock-motor")
+    parser.add_argument(
+        "--db-latency-ms", type=float, default=0.5, help="Simulated user lookup round trip on mongomock-motor"
+    )
+    parser.add_argument("--llm-latency-ms", type=float, default=20.0)
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--json", help="Write results to this path")
+    parser.add_argument("--compare", type=Path, help="Baseline results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed p50 slowdown before failing")
+    args = parser.parse_args()
+
+    # Keep the application's request logging, but off the terminal.
+    configure_logging(stream=open(os.devnull, "w"))
+
+    # No chunk delay, so a non-streaming reply takes exactly --llm-latency-ms.
+    with run_fake_llm_server(args.port, latency_ms=args.llm_latency_ms, jitter_ms=0.0, chunk_delay_ms=0.0) as api_root:
+        # Settings and the LLM client were built when main was imported; rebuild them for the fake API.
+        os.environ["GEMINI_API_ROOT"] = api_root
+        get_settings.cache_clear()
+        asyncio.run(close_llm_client())
+        results = asyncio.run(_run(args))
+
+    backend = "mongod" if args.mongo_uri else "mongomock-motor"
+    print_table(f"Hot paths on {backend} ({args.foods or 'seed'} foods, {args.users} users)", results)
+    write_json(
+        args.json,
+        {
+            "benchmark": "hot_paths",
+            "commit": _git_commit(),
+            "config": {key: value for key, value in vars(args).items() if key not in ("json", "compare")},
+            "results": results,
+        },
+    )
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())["results"]
+        comparison = compare_results(baseline, results, tolerance=args.tolerance)
+        print_table(f"p50 against {args.compare}", comparison)
+        if any(row["regressed"] for row in comparison.values()):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
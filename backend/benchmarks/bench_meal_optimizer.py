@@ -0,0 +1,105 @@
+"""Compare greedy and beam-search meal selection on plan quality and latency.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_meal_optimizer --plans 300 --budget-ms 50
+"""
+
+import argparse
+import itertools
+import random
+import statistics
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from benchmarks.common import latency_summary, print_table, write_json
+from models.user_model import UserInDB
+from utils.diet_generator import (
+    MEAL_DISTRIBUTION,
+    _build_weekly_plan,
+    _calculate_daily_calories,
+    _macro_target,
+)
+from utils.food_catalog import build_snapshot
+from utils.meal_optimizer import PlanDeadline
+from utils.seed_data import _generate_food_documents
+
+
+def _profiles() -> List[UserInDB]:
+    users = []
+    combos = itertools.product(
+        ["weight_loss", "maintenance", "weight_gain"],
+        ["sedentary", "moderate", "very_active"],
+        ["veg", "non_veg", "vegan", "keto", "paleo", "balanced"],
+        ["male", "female"],
+    )
+    for index, (goal, activity, diet, gender) in enumerate(combos):
+        users.append(
+            UserInDB(
+                name=f"bench{index}",
+                email=f"bench{index}@example.com",
+                age=20 + index % 50,
+                height=155 + index % 40,
+                weight=50 + index % 60,
+                goal=goal,
+                activityLevel=activity,
+                dietType=diet,
+                gender=gender,
+                password="x",
+            )
+        )
+    return users
+
+
+def _day_errors(week, daily_target: int) -> Dict[str, float]:
+    target = _macro_target(daily_target)
+    errors = {"calories": [], "protein": [], "carbs": [], "fat": []}
+    for day in week:
+        actual = np.array([day.totalCalories, day.macros["protein"], day.macros["carbs"], day.macros["fat"]])
+        for key, value in zip(errors, np.abs(actual - target) / target):
+            errors[key].append(float(value))
+    return {key: statistics.fmean(values) for key, values in errors.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--plans", type=int, default=300)
+    parser.add_argument("--budget-ms", type=float, default=50.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="Write results to this path")
+    args = parser.parse_args()
+
+    snapshot = build_snapshot(_generate_food_documents())
+    users = _profiles()
+    results = {}
+
+    for mode in ("greedy", "beam"):
+        rng = random.Random(args.seed)
+        latencies: List[float] = []
+        quality: Dict[str, List[float]] = {"calories": [], "protein": [], "carbs": [], "fat": []}
+        for index in range(args.plans):
+            user = users[index % len(users)]
+            foods_by_meal = snapshot.candidates_by_meal([user.dietType, "balanced"])
+            if any(foods_by_meal[meal].size == 0 for meal in MEAL_DISTRIBUTION):
+                continue
+            daily_target = _calculate_daily_calories(user)
+            started = time.perf_counter()
+            deadline = PlanDeadline(args.budget_ms) if mode == "beam" else None
+            week = _build_weekly_plan(snapshot, foods_by_meal, daily_target, deadline, rng)
+            latencies.append(time.perf_counter() - started)
+            for key, value in _day_errors(week, daily_target).items():
+                quality[key].append(value)
+
+        summary = latency_summary(latencies)
+        for key, values in quality.items():
+            summary[f"{key}Err%"] = round(statistics.fmean(values) * 100, 2)
+        results[mode] = summary
+
+    print_table(f"Weekly plan generation ({snapshot.size} foods, budget {args.budget_ms} ms)", results)
+    write_json(args.json, {"benchmark": "meal_optimizer", "results": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Stored size and read cost of meal plans: embedded weeks vs compact and food-id encodings.
+
+Plans are generated for synthetic users on the seed catalog; each encoding is
+measured as the BSON size of a full ``mealplans`` document, plus the time to
+encode a week into a document and to read the week back from BSON (which,
+for food references, includes hydrating from the catalog). Run from the
+backend directory:
+
+    python -m benchmarks.bench_plan_storage --plans 500
+"""
+
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("JWT_SECRET", "benchmark-secret")
+
+import bson
+from bson import ObjectId
+
+from benchmarks.common import latency_summary, print_table, write_json
+from models.user_model import UserInDB
+from utils.diet_generator import _build_weekly_plan, _calculate_daily_calories
+from utils.food_catalog import build_snapshot
+from utils.plan_store import FORMAT_POSITIONAL, FORMAT_REFS, decode_week, encode_refs, encode_week, hydrate_refs
+from utils.seed_data import _generate_food_documents
+from utils.synthetic_data import iter_synthetic_users
+
+
+def _timed(function: Callable[[Any], Any], items: List[Any]) -> List[float]:
+    samples = []
+    for item in items:
+        started = time.perf_counter()
+        function(item)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--plans", type=int, default=500)
+    parser.add_argument("--json", help="Write results to this path")
+    args = parser.parse_args()
+
+    # Real catalogs are keyed by ObjectId, which is what plans reference.
+    snapshot = build_snapshot({**doc, "_id": ObjectId()} for doc in _generate_food_documents())
+    users = [UserInDB(**profile) for profile in iter_synthetic_users(args.plans, password_hash="x")]
+    weeks = []
+    for index, user in enumerate(users):
+        foods_by_meal = snapshot.candidates_by_meal([user.dietType, "balanced"])
+        week = _build_weekly_plan(snapshot, foods_by_meal, _calculate_daily_calories(user), None, random.Random(index))
+        weeks.append([day.model_dump() for day in week])
+
+    envelope = {"_id": ObjectId(), "userId": ObjectId(), "createdAt": datetime.now(tz=timezone.utc), "seq": 1}
+    encoders: Dict[str, Callable[[Any], bytes]] = {
+        "embedded": lambda week: bson.encode({**envelope, "week": week}),
+        "positional": lambda week: bson.encode({**envelope, "format": FORMAT_POSITIONAL, "days": encode_week(week)}),
+        "food_refs": lambda week: bson.encode({**envelope, "format": FORMAT_REFS, "days": encode_refs(week)}),
+    }
+    readers: Dict[str, Callable[[bytes], Any]] = {
+        "embedded": lambda raw: bson.decode(raw)["week"],
+        "positional": lambda raw: decode_week(bson.decode(raw)["days"]),
+        "food_refs": lambda raw: hydrate_refs(snapshot, bson.decode(raw)["days"]),
+    }
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, encode in encoders.items():
+        stored = [encode(week) for week in weeks]
+        results[name] = {
+            "bytesPerPlan": round(sum(map(len, stored)) / len(stored), 1),
+            "encodeP50Ms": latency_summary(_timed(encode, weeks))["p50Ms"],
+            "readP50Ms": latency_summary(_timed(readers[name], stored))["p50Ms"],
+        }
+    for row in results.values():
+        row["sizeRatio"] = round(row["bytesPerPlan"] / results["embedded"]["bytesPerPlan"], 3)
+
+    print_table(f"{args.plans} weekly plans on the seed catalog ({snapshot.size} foods)", results)
+    write_json(args.json, {"benchmark": "plan_storage", "results": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Per-request overhead of the old ``log_requests`` middleware vs structured queue logging.
+
+Each mode serves the same small authenticated route through the ASGI app and
+writes its logs to a real file, which is then checked for leaked bearer
+tokens. Run from the backend directory:
+
+    python -m benchmarks.bench_request_logging --requests 2000
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("JWT_SECRET", "benchmark-secret")
+
+import httpx
+from fastapi import FastAPI, Request
+
+from benchmarks.common import latency_summary, print_table, write_json
+from utils.request_logging import RequestLogMiddleware, configure_logging, stop_logging
+
+_TOKEN = "eyJhbGciOiJIUzI1NiJ9.benchmark-token-value.signature"
+_ALL = {"2xx": 1.0, "3xx": 1.0, "4xx": 1.0, "5xx": 1.0}
+
+
+def _app(mode: str) -> FastAPI:
+    app = FastAPI()
+    logger = logging.getLogger("main")
+
+    if mode == "legacy":
+        # The middleware main.py used before structured logging, verbatim.
+        @app.middleware("http")
+        async def log_requests(request: Request, call_next):
+            start_time = time.time()
+            logger.info(f"Request: {request.method} {request.url}")
+            logger.info(f"Headers: {dict(request.headers)}")
+
+            response = await call_next(request)
+
+            process_time = time.time() - start_time
+            logger.info(f"Response: {response.status_code} in {process_time:.2f}s")
+
+            return response
+
+    elif mode.startswith("structured"):
+        rates = dict(_ALL, **({"2xx": 0.1} if mode == "structured-sampled" else {}))
+        app.add_middleware(RequestLogMiddleware, sample_rates=rates)
+
+    @app.get("/diet/{user_id}")
+    async def plan(user_id: str):
+        return {"success": True, "userId": user_id}
+
+    return app
+
+
+def _configure(mode: str, sink) -> None:
+    stop_logging()
+    root = logging.getLogger()
+    if mode == "legacy":
+        # logging.basicConfig(level=logging.INFO) as main.py had it, writing to the sink.
+        handler = logging.StreamHandler(sink)
+        handler.setFormatter(logging.Formatter("%(levelname)s:%(name)s:%(message)s"))
+        root.handlers = [handler]
+        root.setLevel(logging.INFO)
+    else:
+        configure_logging("INFO", "json", stream=sink)
+
+
+async def _measure(app: FastAPI, requests: int, concurrency: int) -> Dict[str, Any]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    headers = {"Authorization": f"Bearer {_TOKEN}", "User-Agent": "bench", "Accept": "application/json"}
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+
+        async def call(index: int) -> None:
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(f"/diet/user{index}?week=1", headers=headers)
+                latencies.append(time.perf_counter() - started)
+                response.raise_for_status()
+
+        await asyncio.gather(*(call(index) for index in range(50)))
+        latencies.clear()
+        wall_started = time.perf_counter()
+        await asyncio.gather(*(call(index) for index in range(requests)))
+        wall = time.perf_counter() - wall_started
+
+    summary = latency_summary(latencies)
+    summary["requestsPerSec"] = round(requests / wall, 2)
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--json", help="Write results to this path")
+    args = parser.parse_args()
+
+    # The benchmark's own HTTP client would otherwise log every call too.
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    results: Dict[str, Dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("none", "legacy", "structured", "structured-sampled"):
+            log_path = Path(tmp) / f"{mode}.log"
+            with log_path.open("w", encoding="utf-8") as sink:
+                _configure(mode, sink)
+                results[mode] = asyncio.run(_measure(_app(mode), args.requests, args.concurrency))
+                stop_logging()
+            text = log_path.read_text(encoding="utf-8")
+            results[mode]["logBytesPerRequest"] = round(len(text) / (args.requests + 50), 1)
+            results[mode]["tokenLeaked"] = _TOKEN in text
+
+    print_table(f"{args.requests} requests at concurrency {args.concurrency}", results)
+    write_json(args.json, {"benchmark": "request_logging", "results": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import json
+import statistics
+from pathlib import Path
+from typing import Any, Dict, Sequence
+
+
+def latency_summary(samples_s: Sequence[float]) -> Dict[str, float]:
+    """p50/p95/p99/max in milliseconds plus throughput for a list of durations in seconds."""
+    ordered = sorted(samples_s)
+    count = len(ordered)
+    if not count:
+        return {"count": 0}
+
+    def pct(q: float) -> float:
+        return round(ordered[min(count - 1, int(q * count))] * 1000, 4)
+
+    total = sum(ordered)
+    return {
+        "count": count,
+        "opsPerSec": round(count / total, 2) if total else float("inf"),
+        "meanMs": round(statistics.fmean(ordered) * 1000, 4),
+        "p50Ms": pct(0.50),
+        "p95Ms": pct(0.95),
+        "p99Ms": pct(0.99),
+        "maxMs": round(ordered[-1] * 1000, 4),
+    }
+
+
+def print_table(title: str, rows: Dict[str, Dict[str, Any]]) -> None:
+    print(f"\n{title}")
+    columns = sorted({key for row in rows.values() for key in row}, key=str)
+    widths = {col: max(12, len(col) + 2) for col in columns}
+    print("  " + "name".ljust(28) + "".join(col.rjust(widths[col]) for col in columns))
+    for name, row in rows.items():
+        print("  " + name.ljust(28) + "".join(str(row.get(col, "")).rjust(widths[col]) for col in columns))
+
+
+def write_json(path: str | None, payload: Dict[str, Any]) -> None:
+    if not path:
+        return
+    Path(path).write_text(json.dumps(payload, indent=2, sort_keys=True))
+    print(f"\nResults written to {path}")
+
+
+def compare_results(
+    baseline: Dict[str, Dict[str, Any]],
+    current: Dict[str, Dict[str, Any]],
+    metric: str = "p50Ms",
+    tolerance: float = 0.10,
+) -> Dict[str, Dict[str, Any]]:
+    """Per-case ``metric`` change against ``baseline``; a rise beyond ``tolerance`` is flagged as a regression."""
+    rows: Dict[str, Dict[str, Any]] = {}
+    for name, row in current.items():
+        before = baseline.get(name, {}).get(metric)
+        after = row.get(metric)
+        if not before or after is None:
+            continue
+        change = after / before - 1
+        rows[name] = {
+            "baseline": before,
+            "current": after,
+            "changePct": round(change * 100, 1),
+            "regressed": change > tolerance,
+        }
+    return rows
@@ -0,0 +1,102 @@
+"""Local stand-in for the Gemini ``generateContent`` API.
+
+Point the backend at it with ``GEMINI_API_ROOT=http://127.0.0.1:8089/v1`` and
+any ``GEMINI_API_KEY``. Run standalone from the backend directory:
+
+    python -m benchmarks.fake_llm_server --port 8089 --latency-ms 300
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+def create_app(
+    latency_ms: float = 200.0,
+    jitter_ms: float = 50.0,
+    error_rate: float = 0.0,
+    stream_chunks: int = 20,
+    chunk_delay_ms: float = 40.0,
+) -> FastAPI:
+    app = FastAPI()
+    app.state.requests = 0
+
+    @app.post("/v1/models/{model}:generateContent")
+    async def generate_content(model: str, request: Request):
+        app.state.requests += 1
+        body = await request.json()
+        await asyncio.sleep(max(0.0, latency_ms + random.uniform(-jitter_ms, jitter_ms)) / 1000)
+        if random.random() < error_rate:
+            return JSONResponse({"error": {"code": 503, "message": "fake overload"}}, status_code=503)
+
+        # Non-streaming replies wait for the whole generation, like the real API.
+        await asyncio.sleep(stream_chunks * chunk_delay_ms / 1000)
+        prompt = body["contents"][0]["parts"][0]["text"]
+        text = f"[{model}] Fake reply to a {len(prompt)}-character prompt."
+        return {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}]}
+
+    @app.post("/v1/models/{model}:streamGenerateContent")
+    async def stream_generate_content(model: str, request: Request):
+        app.state.requests += 1
+        await request.json()
+        if random.random() < error_rate:
+            return JSONResponse({"error": {"code": 503, "message": "fake overload"}}, status_code=503)
+
+        async def events():
+            # latency_ms is the time to the first token; later chunks trickle in.
+            await asyncio.sleep(max(0.0, latency_ms + random.uniform(-jitter_ms, jitter_ms)) / 1000)
+            for index in range(stream_chunks):
+                if index:
+                    await asyncio.sleep(chunk_delay_ms / 1000)
+                chunk = {"candidates": [{"content": {"role": "model", "parts": [{"text": f"token{index} "}]}}]}
+                yield f"data: {json.dumps(chunk)}\r\n\r\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+@contextmanager
+def run_fake_llm_server(port: int = 8089, **app_options) -> Iterator[str]:
+    """Serve the fake API on a background thread; yields the API root URL."""
+    config = uvicorn.Config(create_app(**app_options), host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}/v1"
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake Gemini generateContent server")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--stream-chunks", type=int, default=20)
+    parser.add_argument("--chunk-delay-ms", type=float, default=40.0)
+    args = parser.parse_args()
+    uvicorn.run(
+        create_app(args.latency_ms, args.jitter_ms, args.error_rate, args.stream_chunks, args.chunk_delay_ms),
+        host="127.0.0.1",
+        port=args.port,
+        log_level="info",
+    )
+
+
+if __name__ == "__main__":
+    main()
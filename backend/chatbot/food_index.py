@@ -0,0 +1,131 @@
+import asyncio
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.food_catalog import DIET_BITS, MEAL_BITS, CatalogSnapshot
+
+_WORD_RE = re.compile(r"[\w']+")
+
+# Extra searchable terms for the diet and meal labels stored on each food.
+_DIET_TERMS: Dict[str, List[str]] = {
+    "veg": ["veg", "vegetarian"],
+    "non_veg": ["non", "veg", "nonveg", "meat"],
+    "vegan": ["vegan", "plant"],
+    "keto": ["keto", "low", "carb"],
+    "paleo": ["paleo"],
+    "balanced": ["balanced"],
+}
+
+
+def index_terms(text: str) -> List[str]:
+    """Lowercase word tokens with a light plural strip, shared by documents and queries."""
+    terms = []
+    for word in _WORD_RE.findall(text.lower()):
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+class FoodSearchIndex:
+    """In-memory BM25 index over food names, diet type and meal types of one catalog snapshot."""
+
+    def __init__(self, snapshot: CatalogSnapshot, k1: float = 1.2, b: float = 0.75) -> None:
+        self.snapshot = snapshot
+        self.k1 = k1
+        self.b = b
+        self._diet_labels = {bit: label for label, bit in DIET_BITS.items()}
+
+        postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        lengths = np.zeros(snapshot.size, dtype=np.float32)
+        for row, name in enumerate(snapshot.names):
+            terms = index_terms(name)
+            terms.extend(_DIET_TERMS.get(self._diet_labels.get(int(snapshot.diet_mask[row]), ""), []))
+            terms.extend(index_terms(" ".join(self._meal_types(row))))
+            lengths[row] = len(terms)
+            for term, count in Counter(terms).items():
+                postings[term].append((row, count))
+
+        average_length = float(lengths.mean()) if snapshot.size else 0.0
+        length_norm = k1 * (1 - b + b * lengths / average_length) if average_length else lengths
+        self._postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for term, items in postings.items():
+            rows = np.fromiter((row for row, _ in items), dtype=np.int64, count=len(items))
+            tf = np.fromiter((count for _, count in items), dtype=np.float32, count=len(items))
+            idf = math.log(1 + (snapshot.size - len(items) + 0.5) / (len(items) + 0.5))
+            # Store the full per-document BM25 contribution so queries only add.
+            self._postings[term] = (rows, (idf * tf * (k1 + 1) / (tf + length_norm[rows])).astype(np.float32))
+
+        # Context for questions that name no food: the most protein-dense foods first.
+        calories, protein = snapshot.nutrients[:, 0], snapshot.nutrients[:, 1]
+        density = np.divide(protein, calories, out=np.zeros(snapshot.size), where=calories > 0)
+        self._default_rows = np.lexsort((calories, -density))
+
+    def _meal_types(self, row: int) -> List[str]:
+        mask = int(self.snapshot.meal_mask[row])
+        return [meal for meal, bit in MEAL_BITS.items() if mask & bit]
+
+    def search(self, query: str, k: int) -> List[int]:
+        """Row indices of the ``k`` best-matching foods, best first."""
+        matched = [self._postings[term] for term in set(index_terms(query)) if term in self._postings]
+        if not matched or k <= 0:
+            return []
+
+        rows = np.concatenate([item[0] for item in matched])
+        weights = np.concatenate([item[1] for item in matched])
+        unique_rows, inverse = np.unique(rows, return_inverse=True)
+        scores = np.bincount(inverse, weights=weights)
+        if scores.size > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(scores.size)
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return unique_rows[top].tolist()
+
+    def document(self, row: int) -> Dict[str, Any]:
+        calories, protein, carbs, fat = self.snapshot.nutrients[row].tolist()
+        return {
+            "food": self.snapshot.names[row],
+            "calories": int(calories),
+            "protein": protein,
+            "carbs": carbs,
+            "fat": fat,
+            "type": self._diet_labels.get(int(self.snapshot.diet_mask[row]), "balanced"),
+            "mealType": self._meal_types(row),
+        }
+
+    def top_documents(self, query: str, k: int) -> List[Dict[str, Any]]:
+        """Documents for the ``k`` best matches, or the ``k`` most protein-dense foods when no term matches."""
+        rows = self.search(query, k) or self._default_rows[: max(k, 0)].tolist()
+        return [self.document(row) for row in rows]
+
+
+_index: Optional[FoodSearchIndex] = None
+_pending: Optional[Tuple[CatalogSnapshot, "asyncio.Future[FoodSearchIndex]"]] = None
+
+
+async def get_food_index(snapshot: CatalogSnapshot) -> FoodSearchIndex:
+    """Index for ``snapshot``, rebuilt whenever the catalog snapshot changes.
+
+    A rebuild runs once per snapshot on the default executor, so requests
+    keep being served while it runs; concurrent callers await the same build.
+    """
+    global _index, _pending
+    if _index is not None and _index.snapshot is snapshot:
+        return _index
+    if _pending is None or _pending[0] is not snapshot:
+        _pending = (snapshot, asyncio.get_running_loop().run_in_executor(None, FoodSearchIndex, snapshot))
+    build = _pending[1]
+    try:
+        # Shielded so a cancelled request does not cancel the build other requests wait on.
+        index = await asyncio.shield(build)
+    finally:
+        if build.done() and _pending is not None and _pending[1] is build:
+            _pending = None
+    if _index is None or _index.snapshot.version <= snapshot.version:
+        _index = index
+    return index
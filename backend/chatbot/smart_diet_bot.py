@@ -1,16 +1,19 @@
-import asyncio
 import logging
 import re
-from collections import Counter
-from typing import Any, Dict, Optional
+import time
+from collections import Counter, OrderedDict, defaultdict
+from typing import Any, AsyncIterator, Dict, FrozenSet, List, Optional, Set, Tuple
 
 from motor.motor_asyncio import AsyncIOMotorCollection
-import requests
 
+from chatbot.food_index import get_food_index
+from utils.food_catalog import get_food_catalog
+from utils.food_search import get_food_name_index
+from utils.llm_client import get_llm_client
+from utils.metrics import CHAT_CACHE_LOOKUPS
 from utils.settings import get_settings
 
 _LOGGER = logging.getLogger(__name__)
-_GEMINI_API_ROOT = "https://generativelanguage.googleapis.com/v1"
 
 
 def _tokenize(text: str) -> Counter:
@@ -18,41 +21,242 @@ def _tokenize(text: str) -> Counter:
     return Counter(words)
 
 
+# Words that flip or contrast a question's meaning ("without dairy", "rice or
+# quinoa"). Questions with any of them only ever match their exact wording.
+_DISTINCT_MEANING_TOKENS = frozenset(
+    """
+    no not never without avoid free instead don't dont doesn't doesnt isn't isnt aren't arent
+    can't cant cannot shouldn't shouldnt won't wont or vs versus than compare compared comparison
+    difference better worse best worst more less fewer higher lower
+    """.split()
+)
+
+CacheKey = Tuple[int, Tuple[str, ...]]
+
+
+class ResponseCache:
+    """LLM reply cache keyed by the normalized token sequence, scoped to a food-context version.
+
+    Lookups try the exact token sequence first, then the most similar cached
+    question by token-set Jaccard similarity at or above ``similarity``.
+    Negated and comparison questions never take the similarity path.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float, similarity: float, min_similar_tokens: int = 4) -> None:
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.similarity = similarity
+        self.min_similar_tokens = min_similar_tokens
+        self._entries: "OrderedDict[CacheKey, Tuple[float, str]]" = OrderedDict()
+        self._postings: Dict[Tuple[int, str], Set[Tuple[str, ...]]] = defaultdict(set)
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def fingerprint(message: str) -> Tuple[str, ...]:
+        return tuple(_tokenize(message))
+
+    @staticmethod
+    def _fuzzy_eligible(token_set: FrozenSet[str]) -> bool:
+        return token_set.isdisjoint(_DISTINCT_MEANING_TOKENS)
+
+    def get(self, message: str, context_version: int) -> Optional[str]:
+        tokens = self.fingerprint(message)
+        if not tokens:
+            self._record_miss()
+            return None
+
+        reply = self._lookup((context_version, tokens))
+        if reply is not None:
+            self.exact_hits += 1
+            CHAT_CACHE_LOOKUPS.inc("exact_hit")
+            return reply
+
+        token_set = frozenset(tokens)
+        if self.similarity < 1.0 and len(token_set) >= self.min_similar_tokens and self._fuzzy_eligible(token_set):
+            match = self._most_similar(token_set, context_version)
+            if match is not None:
+                reply = self._lookup((context_version, match))
+                if reply is not None:
+                    self.similar_hits += 1
+                    CHAT_CACHE_LOOKUPS.inc("similar_hit")
+                    return reply
+
+        self._record_miss()
+        return None
+
+    def _record_miss(self) -> None:
+        self.misses += 1
+        CHAT_CACHE_LOOKUPS.inc("miss")
+
+    def set(self, message: str, context_version: int, reply: str) -> None:
+        tokens = self.fingerprint(message)
+        if not tokens or self.max_size <= 0:
+            return
+        key = (context_version, tokens)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, reply)
+        self._entries.move_to_end(key)
+        token_set = frozenset(tokens)
+        if self._fuzzy_eligible(token_set):
+            for token in token_set:
+                self._postings[(context_version, token)].add(tokens)
+        while len(self._entries) > self.max_size:
+            oldest, _ = self._entries.popitem(last=False)
+            self._drop_postings(oldest)
+            self.evictions += 1
+
+    def _lookup(self, key: CacheKey) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, reply = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self._drop_postings(key)
+            return None
+        self._entries.move_to_end(key)
+        return reply
+
+    def _most_similar(self, token_set: FrozenSet[str], context_version: int) -> Optional[Tuple[str, ...]]:
+        overlap: Counter = Counter()
+        for token in token_set:
+            overlap.update(self._postings.get((context_version, token), ()))
+
+        best, best_score = None, self.similarity
+        for candidate, shared in overlap.items():
+            score = shared / (len(token_set) + len(set(candidate)) - shared)
+            if score >= best_score:
+                best, best_score = candidate, score
+        return best
+
+    def _drop_postings(self, key: CacheKey) -> None:
+        context_version, tokens = key
+        for token in set(tokens):
+            posting = self._postings.get((context_version, token))
+            if posting is not None:
+                posting.discard(tokens)
+                if not posting:
+                    del self._postings[(context_version, token)]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._postings.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.exact_hits + self.similar_hits
+        lookups = hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxSize": self.max_size,
+            "exactHits": self.exact_hits,
+            "similarHits": self.similar_hits,
+            "misses": self.misses,
+            "hitRatio": round(hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "ttlSeconds": self.ttl_seconds,
+        }
+
+
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    global _response_cache
+    if _response_cache is None:
+        settings = get_settings()
+        _response_cache = ResponseCache(
+            settings.chat_cache_size, settings.chat_cache_ttl_seconds, settings.chat_cache_similarity
+        )
+    return _response_cache
+
+
+async def _food_context_version(foods_collection: AsyncIOMotorCollection) -> int:
+    # Load the catalog first, so replies cached before it was ready are not keyed on a placeholder version.
+    snapshot = await get_food_catalog().get(foods_collection)
+    return snapshot.version
+
+
 async def handle_chat_message(message: str, foods_collection: AsyncIOMotorCollection) -> Dict[str, str]:
+    cache = get_response_cache()
+    context_version = await _food_context_version(foods_collection)
+    cached_reply = cache.get(message, context_version)
+    if cached_reply is not None:
+        return {"reply": cached_reply}
+
     # Always try Gemini first for a more natural, comprehensive response
     gemini_response = await _gemini_reply(message, foods_collection)
     if gemini_response:
+        cache.set(message, context_version, gemini_response)
         return {"reply": gemini_response}
 
+    return {"reply": await _fallback_reply(message, foods_collection)}
+
+
+async def stream_chat_message(message: str, foods_collection: AsyncIOMotorCollection) -> AsyncIterator[str]:
+    """Yield the reply in chunks as Gemini produces them.
+
+    Cached and non-LLM replies arrive as a single chunk. If the stream fails
+    before producing any text, the token-based fallback reply is used instead;
+    if it fails midway, ``LLMStreamInterrupted`` propagates and the partial
+    reply is not cached.
+    """
+    cache = get_response_cache()
+    context_version = await _food_context_version(foods_collection)
+    cached_reply = cache.get(message, context_version)
+    if cached_reply is not None:
+        yield cached_reply
+        return
+
+    client = get_llm_client()
+    if client is not None:
+        chunks: List[str] = []
+        payload = await _build_gemini_payload(message, foods_collection)
+        async for event in client.stream_generate_content(payload, caller="chatbot"):
+            text = _extract_stream_text(event)
+            if text:
+                chunks.append(text)
+                yield text
+        if chunks:
+            cache.set(message, context_version, "".join(chunks).strip())
+            return
+
+    yield await _fallback_reply(message, foods_collection)
+
+
+async def _fallback_reply(message: str, foods_collection: AsyncIOMotorCollection) -> str:
     # Fallback to token-based responses if Gemini is unavailable
     tokens = _tokenize(message)
     token_set = set(tokens)
 
     if "calories" in token_set and "in" in token_set:
-        return {"reply": await _calorie_lookup(message, foods_collection)}
+        return await _calorie_lookup(message, foods_collection)
 
     if "high" in token_set and ({"protein", "proteins"} & token_set):
-        return {"reply": await _high_protein_suggestions(foods_collection)}
+        return await _high_protein_suggestions(foods_collection)
 
     if "weight" in token_set and "gain" in token_set:
-        return {"reply": await _goal_suggestions(foods_collection, high_calorie=True)}
+        return await _goal_suggestions(foods_collection, high_calorie=True)
 
     if "weight" in token_set and "loss" in token_set:
-        return {"reply": await _goal_suggestions(foods_collection, high_calorie=False)}
+        return await _goal_suggestions(foods_collection, high_calorie=False)
 
-    return {"reply": _default_tip()}
+    return _default_tip()
 
 
 async def _calorie_lookup(message: str, foods_collection: AsyncIOMotorCollection) -> str:
     food_name = message.lower().split("in", 1)[-1].strip(" ?!.")
-    food_doc = await foods_collection.find_one({"food": {"$regex": food_name, "$options": "i"}})
-    if food_doc:
-        return f"{food_doc['food']} has approximately {food_doc['calories']} calories per serving."
+    index = await get_food_name_index(await get_food_catalog().get(foods_collection))
+    row = index.best_match(food_name)
+    if row is not None:
+        snapshot = index.snapshot
+        return f"{snapshot.names[row]} has approximately {int(snapshot.calories[row])} calories per serving."
     return "I couldn't find that item, but focusing on whole foods is always a good idea!"
 
 
 async def _high_protein_suggestions(foods_collection: AsyncIOMotorCollection) -> str:
-    cursor = foods_collection.find({"protein": {"$gte": 20}}).sort("protein", -1).limit(3)
+    cursor = foods_collection.find({"protein": {"$gte": 20}}, {"food": 1, "_id": 0}).sort("protein", -1).limit(3)
     foods = [doc async for doc in cursor]
     if foods:
         suggestions = ", ".join(item["food"] for item in foods)
@@ -63,7 +267,7 @@ async def _high_protein_suggestions(foods_collection: AsyncIOMotorCollection) ->
 async def _goal_suggestions(foods_collection: AsyncIOMotorCollection, *, high_calorie: bool) -> str:
     comparator = {"$gte": 450} if high_calorie else {"$lte": 350}
     sort_order = -1 if high_calorie else 1
-    cursor = foods_collection.find({"calories": comparator}).sort("calories", sort_order).limit(3)
+    cursor = foods_collection.find({"calories": comparator}, {"food": 1, "_id": 0}).sort("calories", sort_order).limit(3)
     foods = [doc async for doc in cursor]
     if foods:
         prefix = "For weight gain, consider calorie-dense meals like " if high_calorie else "Weight loss-friendly picks: "
@@ -97,20 +301,32 @@ def _default_tip() -> str:
 
 
 async def _gemini_reply(message: str, foods_collection: AsyncIOMotorCollection) -> Optional[str]:
-    settings = get_settings()
-    if not settings.gemini_api_key or not settings.gemini_model:
+    client = get_llm_client()
+    if client is None:
+        return None
+
+    payload = await _build_gemini_payload(message, foods_collection)
+    data = await client.generate_content(payload, caller="chatbot")
+    if data is None:
         return None
 
-    # Fetch more food samples for better context
-    food_cursor = foods_collection.find(
-        {}, {"food": 1, "calories": 1, "protein": 1, "carbs": 1, "fat": 1, "type": 1, "mealType": 1}
-    ).limit(50)
-    foods = [doc async for doc in food_cursor]
-    food_context = _format_food_context(foods)
+    parsed = _extract_text_from_gemini(data)
+    if parsed:
+        return parsed
+
+    _LOGGER.info("Gemini API returned no usable text: %s", data)
+    return None
+
+
+async def _build_gemini_payload(message: str, foods_collection: AsyncIOMotorCollection) -> Dict[str, Any]:
+    # Ground the answer in the catalog foods most relevant to the question
+    settings = get_settings()
+    snapshot = await get_food_catalog().get(foods_collection)
+    foods = (await get_food_index(snapshot)).top_documents(message, settings.chat_context_top_k)
+    food_context = _format_food_context(foods, settings.chat_context_token_budget)
     prompt = _build_prompt(message, food_context)
 
-    endpoint = f"{_GEMINI_API_ROOT}/models/{settings.gemini_model}:generateContent"
-    payload = {
+    return {
         "contents": [
             {
                 "role": "user",
@@ -129,32 +345,6 @@ async def _gemini_reply(message: str, foods_collection: AsyncIOMotorCollection)
         }
     }
 
-    def _post_request():
-        return requests.post(endpoint, params={"key": settings.gemini_api_key}, json=payload, timeout=30)
-
-    try:
-        response = await asyncio.to_thread(_post_request)
-    except Exception as exc:  # pragma: no cover - network/runtime issues
-        _LOGGER.warning("Gemini request failed: %s", exc)
-        return None
-
-    if response.status_code != 200:
-        _LOGGER.warning("Gemini API returned %s: %s", response.status_code, response.text)
-        return None
-
-    try:
-        data = response.json()
-    except ValueError as exc:
-        _LOGGER.warning("Failed to decode Gemini response: %s", exc)
-        return None
-
-    parsed = _extract_text_from_gemini(data)
-    if parsed:
-        return parsed
-
-    _LOGGER.info("Gemini API returned no usable text: %s", data)
-    return None
-
 
 def _build_prompt(message: str, food_context: str) -> str:
     return (
@@ -198,19 +388,25 @@ def _build_prompt(message: str, food_context: str) -> str:
     )
 
 
-def _format_food_context(foods: list[dict]) -> str:
+def _format_food_context(foods: list[dict], token_budget: Optional[int] = None) -> str:
     if not foods:
         return "No specific food data available."
     
     formatted_items = []
+    used_tokens = 0
     for item in foods:
         meal_types = ", ".join(item.get("mealType", [])) if item.get("mealType") else "Any"
         diet_type = item.get("type", "balanced")
-        formatted_items.append(
+        line = (
             f"{item['food']} - {item.get('calories', 'n/a')} cal "
             f"(Protein: {item.get('protein', 'n/a')}g, Carbs: {item.get('carbs', 'n/a')}g, "
             f"Fat: {item.get('fat', 'n/a')}g) [Meal: {meal_types}, Type: {diet_type}]"
         )
+        # Roughly four characters per token; foods arrive best match first.
+        used_tokens += len(line) // 4 + 1
+        if token_budget is not None and formatted_items and used_tokens > token_budget:
+            break
+        formatted_items.append(line)
     return "\n".join(formatted_items)
 
 
@@ -233,3 +429,12 @@ def _extract_text_from_gemini(data: dict[str, Any]) -> Optional[str]:
         return top_level_text.strip()
 
     return None
+
+
+def _extract_stream_text(chunk: dict[str, Any]) -> str:
+    # Stream chunks can split words, so parts are joined without trimming.
+    texts = []
+    for candidate in chunk.get("candidates", []) or []:
+        parts = (candidate.get("content") or {}).get("parts") or []
+        texts.extend(part["text"] for part in parts if isinstance(part.get("text"), str))
+    return "".join(texts)
@@ -2,6 +2,7 @@ import certifi
 from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo.errors import PyMongoError
 
+from utils.metrics import MongoCommandMetrics
 from utils.settings import get_settings
 
 mongo_client: AsyncIOMotorClient | None = None
@@ -27,7 +28,8 @@ def connect_to_mongo() -> None:
             tls=True,
             tlsCAFile=certifi.where(),
             serverSelectionTimeoutMS=5000,  # 5 second timeout
-            connectTimeoutMS=10000  # 10 second connection timeout
+            connectTimeoutMS=10000,  # 10 second connection timeout
+            event_listeners=[MongoCommandMetrics()],
         )
         print(f"MongoDB connection initialized with TLS using certifi CA bundle: {certifi.where()}")
     except Exception as e:
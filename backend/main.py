@@ -1,28 +1,52 @@
 import logging
-import time
 import traceback
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 
-from database import close_mongo_connection, connect_to_mongo
+from chatbot.smart_diet_bot import get_response_cache
+from database import close_mongo_connection, connect_to_mongo, get_database
+from routes.admin_routes import router as admin_router
 from routes.auth_routes import router as auth_router
 from routes.diet_routes import router as diet_router
 from routes.chatbot_routes import router as chatbot_router
+from routes.food_routes import router as food_router
 from routes.user_routes import router as user_router
+from utils.dependencies import get_user_cache
+from utils.diet_generator import get_plan_memo
+from utils.food_catalog import get_food_catalog, start_catalog_watcher, stop_catalog_watcher
+from utils.indexes import check_query_plans, ensure_indexes
+from utils.llm_client import close_llm_client, start_llm_client
+from utils.metrics import MetricsMiddleware, render_metrics
+from utils.profiling import ProfilingMiddleware
+from utils.request_logging import RequestLogMiddleware, configure_logging, logging_stats, stop_logging
+from utils.security import password_pool_stats, shutdown_password_pool
+from utils.settings import get_settings
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+settings = get_settings()
+configure_logging(settings.log_level, settings.log_format, settings.log_queue_size)
 logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Starting up AI Diet Planner API...")
     connect_to_mongo()
+    settings = get_settings()
+    if settings.mongo_ensure_indexes:
+        await ensure_indexes(get_database())
+    if settings.mongo_check_query_plans:
+        await check_query_plans(get_database())
+    start_catalog_watcher(get_database())
+    start_llm_client()
     yield
     logger.info("Shutting down AI Diet Planner API...")
+    await stop_catalog_watcher()
+    shutdown_password_pool()
+    await close_llm_client()
     close_mongo_connection()
+    stop_logging()
 
 
 app = FastAPI(
@@ -33,27 +57,27 @@ app = FastAPI(
 )
 
 
-# Custom middleware for request logging
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    start_time = time.time()
-    logger.info(f"Request: {request.method} {request.url}")
-    logger.info(f"Headers: {dict(request.headers)}")
-    
-    response = await call_next(request)
-    
-    process_time = time.time() - start_time
-    logger.info(f"Response: {response.status_code} in {process_time:.2f}s")
-    
-    return response
+# Structured, sampled request logging (replaces per-request header dumps)
+app.add_middleware(
+    RequestLogMiddleware,
+    sample_rates=settings.request_log_sample_rates,
+    route_sample_rates=settings.request_log_route_sample_rates,
+    log_headers=settings.request_log_headers,
+)
+
+# Per-route request counts and latency histograms for /metrics
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
+# Opt-in per-request profiling (X-Profile: 1 with the admin key); absent unless enabled
+if settings.profiling_enabled:
+    app.add_middleware(ProfilingMiddleware, interval_ms=settings.profiling_interval_ms)
 
 
 # Enhanced exception handlers
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
-    logger.error(f"HTTP Exception: {exc.status_code} - {exc.detail}")
-    logger.error(f"Request URL: {request.url}")
-    logger.error(f"Request method: {request.method}")
+    logger.error("HTTP Exception: %s - %s (%s %s)", exc.status_code, exc.detail, request.method, request.url.path)
     
     return JSONResponse(
         status_code=exc.status_code,
@@ -64,6 +88,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
             "path": str(request.url.path)
         },
         headers={
+            **(exc.headers or {}),
             "Access-Control-Allow-Origin": "*",
             "Access-Control-Allow-Credentials": "true"
         }
@@ -130,9 +155,33 @@ app.include_router(auth_router, prefix="/auth", tags=["Auth"])
 app.include_router(user_router, prefix="/user", tags=["User"])
 app.include_router(diet_router, prefix="/diet", tags=["Diet"])
 app.include_router(chatbot_router, prefix="/chat", tags=["Chatbot"])
+app.include_router(food_router, prefix="/foods", tags=["Foods"])
+app.include_router(admin_router, prefix="/admin", tags=["Admin"])
 
 
 @app.get("/", tags=["Health"])
 async def read_root():
     """Health check endpoint."""
     return {"status": "ok", "message": "Smart AI Diet Planner API"}
+
+
+@app.get("/health/cache", tags=["Health"])
+async def cache_stats():
+    """In-process cache counters."""
+    user_cache = get_user_cache()
+    return {
+        "foodCatalog": get_food_catalog().stats(),
+        "planMemo": get_plan_memo().stats(),
+        "users": user_cache.stats() if user_cache is not None else {"enabled": False},
+        "passwordPool": password_pool_stats(),
+        "chatResponses": get_response_cache().stats(),
+        "logging": logging_stats(),
+    }
+
+
+if settings.metrics_enabled:
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """Prometheus scrape endpoint."""
+        return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
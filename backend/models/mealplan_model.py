@@ -11,10 +11,14 @@ from models.user_model import PyObjectId
 
 class MealEntry(BaseModel):
     name: str
+    foodId: str | None = None
     calories: int
     protein: float | None = None
     carbs: float | None = None
     fat: float | None = None
+    servings: float | None = None
+    grams: float | None = None
+    portion: str | None = None
 
 
 class DailyMeals(BaseModel):
@@ -28,6 +32,7 @@ class MealPlanInDB(BaseModel):
     id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
     userId: PyObjectId
     week: List[DailyMeals]
+    seq: int | None = None
     createdAt: datetime = Field(default_factory=lambda: datetime.now(tz=timezone.utc))
 
     model_config = ConfigDict(
@@ -35,3 +40,16 @@ class MealPlanInDB(BaseModel):
         arbitrary_types_allowed=True,
         json_encoders={ObjectId: str},
     )
+
+
+class MealPlanSummary(BaseModel):
+    seq: int
+    createdAt: datetime
+    averageCalories: int
+    macros: Dict[str, float]
+
+
+class MealPlanHistoryEntry(BaseModel):
+    seq: int
+    createdAt: datetime
+    week: List[DailyMeals]
@@ -0,0 +1,25 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import PlainTextResponse
+
+from utils.dependencies import require_admin
+from utils.profiling import get_profile_store
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("/profiles")
+async def list_profiles():
+    return {"success": True, "profiles": [profile.summary() for profile in get_profile_store().recent()]}
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, format: Literal["speedscope", "collapsed"] = "speedscope"):
+    profile = get_profile_store().get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found or already evicted")
+
+    if format == "collapsed":
+        return PlainTextResponse(profile.collapsed())
+    return profile.speedscope()
@@ -7,7 +7,7 @@ from motor.motor_asyncio import AsyncIOMotorCollection
 from database import get_database
 from models.user_model import PyObjectId, UserCreate, UserInDB, UserLogin
 from utils.jwt_handler import create_access_token
-from utils.security import hash_password, verify_password
+from utils.security import PasswordHasherBusy, hash_password_async, verify_password_async
 from utils.settings import get_settings
 
 router = APIRouter()
@@ -33,7 +33,7 @@ async def register_user(payload: UserCreate, response: Response):
             )
 
         user_data = payload.model_dump()
-        user_data["password"] = hash_password(user_data["password"])
+        user_data["password"] = await hash_password_async(user_data["password"])
         now = datetime.now(tz=timezone.utc)
         user_data["createdAt"] = now
         user_data["updatedAt"] = now
@@ -59,6 +59,13 @@ async def register_user(payload: UserCreate, response: Response):
         
     except HTTPException:
         raise
+    except PasswordHasherBusy as exc:
+        logger.warning(f"Password hashing pool saturated for {payload.email}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry shortly",
+            headers={"Retry-After": str(exc.retry_after)},
+        ) from exc
     except Exception as e:
         logger.error(f"Registration error for {payload.email}: {e}")
         raise HTTPException(
@@ -82,7 +89,7 @@ async def login_user(payload: UserLogin, response: Response):
             )
 
         user = UserInDB(**user_data)
-        if not verify_password(payload.password, user.password):
+        if not await verify_password_async(payload.password, user.password):
             logger.warning(f"Login failed - invalid password: {payload.email}")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED, 
@@ -110,6 +117,13 @@ async def login_user(payload: UserLogin, response: Response):
         
     except HTTPException:
         raise
+    except PasswordHasherBusy as exc:
+        logger.warning(f"Password hashing pool saturated for {payload.email}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry shortly",
+            headers={"Retry-After": str(exc.retry_after)},
+        ) from exc
     except Exception as e:
         logger.error(f"Login error for {payload.email}: {e}")
         raise HTTPException(
@@ -1,10 +1,14 @@
+import json
+
 from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-from chatbot.smart_diet_bot import handle_chat_message
+from chatbot.smart_diet_bot import handle_chat_message, stream_chat_message
 from database import get_database
 from models.user_model import UserInDB
 from utils.dependencies import get_current_user
+from utils.llm_client import LLMStreamInterrupted
 
 router = APIRouter()
 
@@ -24,3 +28,27 @@ async def chat_with_bot(
 ):
 	foods_collection = _get_food_collection()
 	return await handle_chat_message(payload.message, foods_collection)
+
+
+@router.post("/stream")
+async def chat_with_bot_stream(
+	payload: ChatRequest,
+	_: UserInDB = Depends(get_current_user),
+):
+	foods_collection = _get_food_collection()
+
+	async def events():
+		try:
+			async for chunk in stream_chat_message(payload.message, foods_collection):
+				yield f"data: {json.dumps({'delta': chunk})}\n\n"
+		except LLMStreamInterrupted:
+			# The reply so far is incomplete; tell the client instead of ending normally.
+			yield f"event: error\ndata: {json.dumps({'message': 'Reply interrupted, please retry'})}\n\n"
+			return
+		yield "event: done\ndata: {}\n\n"
+
+	return StreamingResponse(
+		events(),
+		media_type="text/event-stream",
+		headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+	)
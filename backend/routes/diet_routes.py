@@ -1,13 +1,16 @@
-from datetime import datetime, timezone
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from motor.motor_asyncio import AsyncIOMotorCollection
+from pydantic import BaseModel
 
 from database import get_database
-from models.mealplan_model import MealPlanInDB
+from models.mealplan_model import MealPlanHistoryEntry, MealPlanInDB, MealPlanSummary
 from models.user_model import PyObjectId, UserInDB
-from utils.dependencies import get_current_user
+from utils.batch_generator import generate_plans_for_users
+from utils.dependencies import get_current_user, require_admin
 from utils.diet_generator import generate_weekly_plan
+from utils.plan_store import delete_plans, get_history_entry, list_history, load_plan, save_plan
 
 router = APIRouter()
 
@@ -17,28 +20,37 @@ def _collections() -> tuple[AsyncIOMotorCollection, AsyncIOMotorCollection]:
     return db["mealplans"], db["foods"]
 
 
+class BatchGenerateRequest(BaseModel):
+    userIds: Optional[List[str]] = None
+    workers: Optional[int] = None
+
+
 @router.post("/generate")
 async def generate_diet_plan(current_user: UserInDB = Depends(get_current_user)):
-    mealplans_collection, foods_collection = _collections()
+    _, foods_collection = _collections()
     try:
         week_plan = await generate_weekly_plan(current_user, foods_collection)
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
 
-    payload = {
-        "userId": current_user.id,
-        "week": [item.model_dump() for item in week_plan],
-    "createdAt": datetime.now(tz=timezone.utc),
-    }
-
-    await mealplans_collection.delete_many({"userId": current_user.id})
-    result = await mealplans_collection.insert_one(payload)
-    stored = await mealplans_collection.find_one({"_id": result.inserted_id})
+    db = get_database()
+    stored = await save_plan(db, current_user.id, [item.model_dump() for item in week_plan])
 
-    plan = MealPlanInDB(**stored).model_dump(by_alias=True)
+    plan = MealPlanInDB(**await load_plan(db, stored)).model_dump(by_alias=True)
     return {"success": True, "plan": plan}
 
 
+@router.post("/generate/batch", dependencies=[Depends(require_admin)])
+async def generate_diet_plans_batch(payload: BatchGenerateRequest):
+    if payload.userIds is not None:
+        invalid = [user_id for user_id in payload.userIds if not PyObjectId.is_valid(user_id)]
+        if invalid:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid user ids: {invalid}")
+
+    result = await generate_plans_for_users(get_database(), payload.userIds, workers=payload.workers)
+    return {"success": True, **result.as_dict()}
+
+
 @router.get("/user/{user_id}")
 async def get_user_plan(user_id: str, current_user: UserInDB = Depends(get_current_user)):
     if str(current_user.id) != user_id:
@@ -49,6 +61,7 @@ async def get_user_plan(user_id: str, current_user: UserInDB = Depends(get_curre
     if not plan:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Meal plan not found")
 
+    plan = await load_plan(get_database(), plan)
     return {"success": True, "plan": MealPlanInDB(**plan).model_dump(by_alias=True)}
 
 
@@ -57,7 +70,34 @@ async def delete_user_plan(user_id: str, current_user: UserInDB = Depends(get_cu
     if str(current_user.id) != user_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied")
 
-    mealplans_collection, _ = _collections()
-    result = await mealplans_collection.delete_many({"userId": PyObjectId(user_id)})
+    deleted = await delete_plans(get_database(), PyObjectId(user_id))
+
+    return {"success": True, "deleted": deleted}
+
+
+@router.get("/user/{user_id}/history")
+async def get_user_plan_history(
+    user_id: str,
+    limit: int = Query(10, ge=1, le=50),
+    before: Optional[int] = Query(None, ge=1, description="Return plans older than this seq"),
+    current_user: UserInDB = Depends(get_current_user),
+):
+    if str(current_user.id) != user_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied")
+
+    entries = await list_history(get_database(), PyObjectId(user_id), limit=limit, before=before)
+    history = [MealPlanSummary(**entry).model_dump() for entry in entries]
+    next_before = history[-1]["seq"] if len(history) == limit else None
+    return {"success": True, "history": history, "nextBefore": next_before}
+
+
+@router.get("/user/{user_id}/history/{seq}")
+async def get_user_plan_history_entry(user_id: str, seq: int, current_user: UserInDB = Depends(get_current_user)):
+    if str(current_user.id) != user_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied")
+
+    entry = await get_history_entry(get_database(), PyObjectId(user_id), seq)
+    if entry is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Meal plan not found in history")
 
-    return {"success": True, "deleted": result.deleted_count}
+    return {"success": True, "plan": MealPlanHistoryEntry(**entry).model_dump()}
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, Query
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+from database import get_database
+from models.user_model import UserInDB
+from utils.dependencies import get_current_user
+from utils.food_catalog import get_food_catalog
+from utils.food_search import get_food_name_index
+
+router = APIRouter()
+
+
+def _get_food_collection() -> AsyncIOMotorCollection:
+    return get_database()["foods"]
+
+
+@router.get("/autocomplete")
+async def autocomplete_foods(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    _: UserInDB = Depends(get_current_user),
+):
+    index = await get_food_name_index(await get_food_catalog().get(_get_food_collection()))
+    # The index may still be the previous catalog's while a rebuild runs; its rows refer to its own snapshot.
+    snapshot = index.snapshot
+    rows = index.autocomplete(q, limit)
+    results = []
+    for row in rows:
+        calories, protein, carbs, fat = snapshot.nutrients[row].tolist()
+        results.append(
+            {
+                "id": snapshot.ids[row],
+                "food": snapshot.names[row],
+                "calories": int(calories),
+                "protein": protein,
+                "carbs": carbs,
+                "fat": fat,
+            }
+        )
+    return {"success": True, "results": results}
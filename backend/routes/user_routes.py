@@ -5,7 +5,7 @@ from motor.motor_asyncio import AsyncIOMotorCollection
 
 from database import get_database
 from models.user_model import UserInDB, UserUpdate
-from utils.dependencies import get_current_user
+from utils.dependencies import get_current_user, invalidate_cached_user
 
 router = APIRouter()
 
@@ -31,6 +31,7 @@ async def update_profile(
 
     update_data["updatedAt"] = datetime.now(tz=timezone.utc)
     await users_collection.update_one({"_id": current_user.id}, {"$set": update_data})
+    invalidate_cached_user(current_user.id)
     updated = await users_collection.find_one({"_id": current_user.id})
     if not updated:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
@@ -1,11 +1,15 @@
 """Seed the MongoDB foods collection with starter data."""
 
 import os
-from datetime import datetime, timezone
 
-from dotenv import load_dotenv
 from pymongo import MongoClient
 
+from utils.seed_data import seed_catalog
+from utils.settings import get_settings
+
+# ``source`` of the starter foods, kept apart from the synthetic catalog.
+SAMPLE_SOURCE = "sample"
+
 # Sample food data
 SAMPLE_FOODS = [
     # Breakfast items
@@ -50,29 +54,24 @@ SAMPLE_FOODS = [
 
 def seed_foods() -> None:
     """Seed the foods collection with sample data."""
-    load_dotenv()
-    mongo_uri = os.getenv("MONGO_URI")
-    if not mongo_uri:
-        raise RuntimeError("MONGO_URI is not set in the environment")
+    settings = get_settings()
+    collection_name = os.getenv("FOOD_COLLECTION_NAME", "foods")
 
-    client = MongoClient(mongo_uri)
+    client = MongoClient(settings.mongo_uri)
     try:
-        db = client["diet_planner"]
-        foods_collection = db["foods"]
-        print("✅ Connected to MongoDB")
+        db = client[settings.mongo_db_name]
+        foods_collection = db[collection_name]
+        print(f"✅ Connected to MongoDB ({settings.mongo_db_name}/{collection_name})")
 
         existing_count = foods_collection.count_documents({})
         if existing_count > 0:
             print(f"Database already contains {existing_count} food items. Skipping seed.")
             return
 
-        now = datetime.now(tz=timezone.utc)
-        for food in SAMPLE_FOODS:
-            food["createdAt"] = now
-            food["updatedAt"] = now
-
-        result = foods_collection.insert_many(SAMPLE_FOODS)
-        print(f"✅ Inserted {len(result.inserted_ids)} foods successfully")
+        result = seed_catalog(
+            db, [dict(food) for food in SAMPLE_FOODS], source=SAMPLE_SOURCE, collection_name=collection_name
+        )
+        print(f"✅ Inserted {result.inserted} foods successfully")
     finally:
         client.close()
 
@@ -0,0 +1,187 @@
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+if __package__ in (None, ""):
+    # Allow `python utils/batch_generator.py` from the backend directory.
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database import close_mongo_connection, connect_to_mongo, get_database
+from models.user_model import PyObjectId, UserInDB
+from utils.diet_generator import (
+    MEAL_DISTRIBUTION,
+    _PROFILE_FIELDS,
+    _build_weekly_plan,
+    _resolve_calorie_target,
+    derive_plan_seed,
+    profile_fingerprint,
+)
+from utils.food_catalog import CatalogSnapshot, get_food_catalog
+from utils.meal_optimizer import PlanDeadline
+from utils.plan_store import save_plans
+from utils.settings import get_settings
+
+_LOGGER = logging.getLogger(__name__)
+
+# Exactly the fields plan generation and its deterministic seed read.
+_PROFILE_PROJECTION = {field: 1 for field in _PROFILE_FIELDS}
+
+# Per-process state installed by _init_worker.
+_worker_snapshot: Optional[CatalogSnapshot] = None
+_worker_options: Dict[str, Any] = {}
+
+
+@dataclass
+class BatchResult:
+    requested: int = 0
+    generated: int = 0
+    skipped: int = 0
+    written: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def plans_per_second(self) -> float:
+        return round(self.generated / self.elapsed_seconds, 2) if self.elapsed_seconds else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "plans_per_second": self.plans_per_second}
+
+
+def _init_worker(snapshot: CatalogSnapshot, options: Dict[str, Any]) -> None:
+    global _worker_snapshot, _worker_options
+    _worker_snapshot = snapshot
+    _worker_options = options
+
+
+def _generate_chunk(profiles: Sequence[Dict[str, Any]]) -> List[Tuple[Any, Optional[List[Dict[str, Any]]]]]:
+    """Build weekly plans for raw user documents; ``None`` marks users whose diet has no coverage."""
+    snapshot = _worker_snapshot
+    options = _worker_options
+    results = []
+    for profile in profiles:
+        user = UserInDB.model_construct(**profile)
+        foods_by_meal = snapshot.candidates_by_meal([user.dietType, "balanced"])
+        if any(foods_by_meal[meal].size == 0 for meal in MEAL_DISTRIBUTION):
+            results.append((profile["_id"], None))
+            continue
+        deadline = PlanDeadline(options["budget_ms"]) if options["optimizer"] == "beam" else None
+        seed = derive_plan_seed(profile_fingerprint(user), snapshot.version) if options["deterministic"] else None
+        week = _build_weekly_plan(
+            snapshot, foods_by_meal, _resolve_calorie_target(user), deadline, random.Random(seed)
+        )
+        results.append((profile["_id"], [day.model_dump() for day in week]))
+    return results
+
+
+def _generate_in_pool(
+    chunks: List[Sequence[Dict[str, Any]]], workers: int, snapshot: CatalogSnapshot, options: Dict[str, Any]
+) -> List[List[Tuple[Any, Optional[List[Dict[str, Any]]]]]]:
+    """Run ``_generate_chunk`` over ``chunks`` in worker processes; blocks until the pool has shut down."""
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(chunks)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(snapshot, options),
+    ) as pool:
+        return list(pool.map(_generate_chunk, chunks))
+
+
+def _chunks(items: Sequence[Any], size: int) -> Iterable[Sequence[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+async def generate_plans_for_users(
+    db: AsyncIOMotorDatabase,
+    user_ids: Optional[Sequence[str]] = None,
+    *,
+    workers: Optional[int] = None,
+    chunk_size: int = 64,
+) -> BatchResult:
+    """Generate and store weekly plans for ``user_ids`` (or every user) in one pass.
+
+    The catalog is loaded once and shipped to each worker process; plans are
+    written back with unordered bulk upserts keyed on ``userId`` (see
+    ``save_plans``), which also append them to each user's plan history.
+    """
+    settings = get_settings()
+    started = time.perf_counter()
+    snapshot = await get_food_catalog().get(db["foods"])
+
+    query: Dict[str, Any] = {}
+    if user_ids is not None:
+        query["_id"] = {"$in": [PyObjectId(user_id) for user_id in user_ids]}
+    profiles = [doc async for doc in db["users"].find(query, _PROFILE_PROJECTION)]
+    result = BatchResult(requested=len(user_ids) if user_ids is not None else len(profiles))
+    if not profiles:
+        result.elapsed_seconds = time.perf_counter() - started
+        return result
+
+    options = {
+        "optimizer": settings.plan_optimizer,
+        "budget_ms": settings.plan_optimizer_budget_ms,
+        "deterministic": settings.deterministic_plans,
+    }
+    workers = workers or settings.batch_workers or os.cpu_count() or 1
+    chunks = list(_chunks(profiles, chunk_size))
+
+    if workers == 1 or len(chunks) == 1:
+        _init_worker(snapshot, options)
+        chunk_results = [_generate_chunk(chunk) for chunk in chunks]
+    else:
+        # Spawning the workers and waiting for them to exit both block, so the whole pool lives on a thread.
+        chunk_results = await asyncio.get_running_loop().run_in_executor(
+            None, _generate_in_pool, chunks, workers, snapshot, options
+        )
+
+    plans: List[Tuple[Any, List[Dict[str, Any]]]] = []
+    for user_id, week in (item for chunk in chunk_results for item in chunk):
+        if week is None:
+            result.skipped += 1
+            continue
+        result.generated += 1
+        plans.append((user_id, week))
+
+    for batch in _chunks(plans, settings.batch_write_size):
+        result.written += await save_plans(db, batch)
+
+    result.elapsed_seconds = time.perf_counter() - started
+    _LOGGER.info(
+        "Batch generated %s plans (%s skipped) in %.2fs, %.1f plans/s",
+        result.generated,
+        result.skipped,
+        result.elapsed_seconds,
+        result.plans_per_second,
+    )
+    return result
+
+
+async def _run_cli(user_ids: Optional[List[str]], workers: Optional[int]) -> None:
+    connect_to_mongo()
+    try:
+        result = await generate_plans_for_users(get_database(), user_ids, workers=workers)
+    finally:
+        close_mongo_connection()
+    print(
+        f"✅ Generated {result.generated} plans ({result.skipped} skipped, {result.written} written) "
+        f"in {result.elapsed_seconds:.2f}s — {result.plans_per_second} plans/s"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Regenerate weekly meal plans for many users at once.")
+    parser.add_argument("user_ids", nargs="*", help="User ids to regenerate (default: every user)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+    asyncio.run(_run_cli(args.user_ids or None, args.workers))
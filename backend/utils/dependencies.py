@@ -1,17 +1,23 @@
+import hmac
 import logging
 from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.security import APIKeyHeader, HTTPBearer, HTTPAuthorizationCredentials
 from motor.motor_asyncio import AsyncIOMotorCollection
 from typing import Optional
 
 from database import get_database
 from models.user_model import PyObjectId, UserInDB
 from utils.jwt_handler import JWTException, decode_access_token
+from utils.settings import get_settings
+from utils.ttl_cache import TTLCache
 
 # Use HTTPBearer instead of OAuth2PasswordBearer for better CORS compatibility
 security = HTTPBearer(auto_error=False)
+admin_key_header = APIKeyHeader(name="X-Admin-Key", auto_error=False)
 logger = logging.getLogger(__name__)
 
+_user_cache: Optional[TTLCache[UserInDB]] = None
+
 
 def get_user_collection() -> AsyncIOMotorCollection:
     db = get_database()
@@ -39,7 +45,6 @@ async def get_current_user(credentials: Optional[HTTPAuthorizationCredentials] =
 
     try:
         payload = decode_access_token(token)
-        logger.info(f"Token decoded successfully for user: {payload.get('email')}")
     except JWTException as exc:
         logger.error(f"JWT decode error: {exc}")
         raise HTTPException(
@@ -57,6 +62,15 @@ async def get_current_user(credentials: Optional[HTTPAuthorizationCredentials] =
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    cache = get_user_cache()
+    generation = None
+    if cache is not None:
+        cached_user = cache.get(user_id)
+        if cached_user is not None:
+            return cached_user
+        # An invalidation landing during the lookup below must not be undone by caching its result.
+        generation = cache.generation()
+
     try:
         users_collection = get_user_collection()
         user_data = await users_collection.find_one({"_id": PyObjectId(user_id)})
@@ -68,12 +82,46 @@ async def get_current_user(credentials: Optional[HTTPAuthorizationCredentials] =
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
-        logger.info(f"User authenticated successfully: {user_data.get('email')}")
-        return UserInDB(**user_data)
-        
+        logger.debug("User authenticated successfully: %s", user_data.get("email"))
+        user = UserInDB(**user_data)
+
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Database error during user lookup: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Authentication service error"
         )
+
+    if cache is not None:
+        cache.set(user_id, user, generation=generation)
+    return user
+
+
+def get_user_cache() -> Optional[TTLCache[UserInDB]]:
+    """Short-lived cache of authenticated users keyed by id, or ``None`` when disabled."""
+    global _user_cache
+    settings = get_settings()
+    if not settings.user_cache_enabled:
+        return None
+    if _user_cache is None:
+        _user_cache = TTLCache(settings.user_cache_size, settings.user_cache_ttl_seconds)
+    return _user_cache
+
+
+def invalidate_cached_user(user_id: str) -> None:
+    cache = get_user_cache()
+    if cache is not None:
+        cache.pop(str(user_id))
+
+
+def is_admin_key(api_key: Optional[str]) -> bool:
+    # Admin access is disabled entirely unless ADMIN_API_KEY is configured
+    expected = get_settings().admin_api_key
+    return bool(expected and api_key and hmac.compare_digest(api_key, expected))
+
+
+async def require_admin(api_key: Optional[str] = Depends(admin_key_header)) -> None:
+    if not is_admin_key(api_key):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
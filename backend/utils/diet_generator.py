@@ -1,22 +1,26 @@
 import asyncio
+import hashlib
 import random
 import logging
 import json
-from collections import defaultdict
-from datetime import datetime
-from typing import Any, Dict, List, Optional, Sequence
+from typing import Any, Dict, List, Optional, Tuple
 
-import requests
+import numpy as np
 
 from motor.motor_asyncio import AsyncIOMotorCollection
 
-from models.food_model import FoodInDB, MealType
+from models.food_model import MealType
 from models.mealplan_model import DailyMeals, MealEntry
 from models.user_model import UserInDB
+from utils.food_catalog import CatalogSnapshot, get_food_catalog
+from utils.llm_client import get_llm_client
+from utils.meal_optimizer import PlanDeadline, optimize_meal
+from utils.metrics import PlanCpuTimer
+from utils.portion_engine import ScaledMeal, get_portion_table, scale_meal, scaled_entries
 from utils.settings import get_settings
+from utils.ttl_cache import TTLCache
 
 _LOGGER = logging.getLogger(__name__)
-_GEMINI_API_ROOT = "https://generativelanguage.googleapis.com/v1"
 
 ACTIVITY_FACTORS: Dict[str, float] = {
     "sedentary": 1.2,
@@ -39,6 +43,17 @@ MACRO_DISTRIBUTION = {
     "fat": 0.25,
 }
 
+CALORIES_PER_GRAM = {
+    "protein": 4.0,
+    "carbs": 4.0,
+    "fat": 9.0,
+}
+
+# User fields that change the generated plan; used for seeding and memoization.
+_PROFILE_FIELDS = ("weight", "height", "age", "gender", "goal", "activityLevel", "dietType", "caloriesTarget")
+
+_plan_memo: Optional[TTLCache[List[DailyMeals]]] = None
+
 DAYS_OF_WEEK = [
     "Monday",
     "Tuesday",
@@ -67,95 +82,152 @@ def _calculate_daily_calories(user: UserInDB) -> int:
     return int(max(tdee, 1200))
 
 
+_EMPTY_SELECTION = np.empty(0, dtype=np.intp)
+_SAMPLE_WINDOW = 8
+
+
 async def _load_foods_for_user(
     foods_collection: AsyncIOMotorCollection, diet_type: str
-) -> Dict[MealType, List[FoodInDB]]:
-    meals: Dict[MealType, List[FoodInDB]] = defaultdict(list)
-    cursor = foods_collection.find({"type": {"$in": [diet_type, "balanced"]}})
-    async for item in cursor:
-        food = FoodInDB(**item)
-        for meal_type in food.mealType:
-            meals[meal_type].append(food)
-    return meals
+) -> Tuple[CatalogSnapshot, Dict[MealType, np.ndarray]]:
+    snapshot = await get_food_catalog().get(foods_collection)
+    return snapshot, snapshot.candidates_by_meal([diet_type, "balanced"])
 
 
 def _choose_meal_items(
-    available_foods: Sequence[FoodInDB],
-    used_ids: set[str],
+    snapshot: CatalogSnapshot,
+    candidates: np.ndarray,
+    used: np.ndarray,
+    target_calories: float,
+    rng: Optional[random.Random] = None,
+) -> np.ndarray:
+    """Pick catalog rows for one meal, preferring rows not yet in ``used``.
+
+    Items are drawn in random order until 80% of ``target_calories`` is reached.
+    Rows are only repeated once every candidate has been used. Chosen rows are
+    marked in ``used``.
+    """
+    if candidates.size == 0:
+        return _EMPTY_SELECTION
+
+    pool = candidates[~used[candidates]]
+    if pool.size == 0:
+        pool = candidates
+
+    sample = (rng or random).sample
+    threshold = target_calories * 0.8
+    window = min(pool.size, _SAMPLE_WINDOW)
+    order = pool[sample(range(pool.size), window)]
+    running = np.cumsum(snapshot.calories[order])
+    if running[-1] < threshold and window < pool.size:
+        order = pool[sample(range(pool.size), pool.size)]
+        running = np.cumsum(snapshot.calories[order])
+
+    cut = int(np.searchsorted(running, threshold, side="left")) + 1
+    selection = order[:cut]
+    used[selection] = True
+    return selection
+
+
+def _compute_macro_totals(nutrients: np.ndarray) -> Dict[str, float]:
+    totals = nutrients[:, 1:].sum(axis=0) if nutrients.size else np.zeros(3)
+    return {
+        "protein": round(float(totals[0]), 2),
+        "carbs": round(float(totals[1]), 2),
+        "fat": round(float(totals[2]), 2),
+    }
+
+
+def _macro_target(target_calories: float) -> np.ndarray:
+    """Calorie and macro gram targets for one meal, in ``NUTRIENT_COLUMNS`` order."""
+    return np.array(
+        [
+            target_calories,
+            target_calories * MACRO_DISTRIBUTION["protein"] / CALORIES_PER_GRAM["protein"],
+            target_calories * MACRO_DISTRIBUTION["carbs"] / CALORIES_PER_GRAM["carbs"],
+            target_calories * MACRO_DISTRIBUTION["fat"] / CALORIES_PER_GRAM["fat"],
+        ]
+    )
+
+
+def _new_plan_deadline() -> Optional[PlanDeadline]:
+    settings = get_settings()
+    if settings.plan_optimizer != "beam":
+        return None
+    return PlanDeadline(settings.plan_optimizer_budget_ms)
+
+
+def _select_meal(
+    snapshot: CatalogSnapshot,
+    candidates: np.ndarray,
+    used: np.ndarray,
     target_calories: float,
-) -> List[MealEntry]:
-    if not available_foods:
-        return []
-
-    candidates = [food for food in available_foods if str(food.id) not in used_ids]
-    if not candidates:
-        candidates = list(available_foods)
-
-    random.shuffle(candidates)
-    selection = []
-    total = 0
-    available_ids = {str(food.id) for food in available_foods}
-    allow_repeats = not (available_ids - used_ids)
-
-    for food in candidates:
-        food_id = str(food.id)
-        if not allow_repeats and food_id in used_ids:
-            continue
-        selection.append(food)
-        used_ids.add(food_id)
-        total += food.calories
-        if total >= target_calories * 0.8:
-            break
-
-    return [
-        MealEntry(
-            name=item.food,
-            calories=item.calories,
-            protein=item.protein,
-            carbs=item.carbs,
-            fat=item.fat,
+    deadline: Optional[PlanDeadline],
+    rng: Optional[random.Random] = None,
+) -> np.ndarray:
+    """Run the macro optimizer while the plan budget lasts, then fall back to greedy."""
+    if deadline is not None:
+        selection = optimize_meal(
+            snapshot, candidates, used, _macro_target(target_calories), deadline=deadline, rng=rng
         )
-        for item in selection
-    ]
+        if selection is not None:
+            used[selection] = True
+            return selection
+    return _choose_meal_items(snapshot, candidates, used, target_calories, rng)
 
 
-def _compute_macro_totals(meals: Dict[MealType, List[MealEntry]]) -> Dict[str, float]:
-    totals = {"protein": 0.0, "carbs": 0.0, "fat": 0.0}
-    for meal_entries in meals.values():
-        for entry in meal_entries:
-            totals["protein"] += entry.protein or 0
-            totals["carbs"] += entry.carbs or 0
-            totals["fat"] += entry.fat or 0
-    return {macro: round(value, 2) for macro, value in totals.items()}
+def _portion_meal(snapshot: CatalogSnapshot, selection: np.ndarray, target_calories: float) -> ScaledMeal:
+    """Scale ``selection`` towards ``target_calories`` or, with scaling disabled, keep single servings."""
+    settings = get_settings()
+    if not settings.plan_portion_scaling:
+        return scale_meal(snapshot, selection, target_calories, min_scale=1.0, max_scale=1.0)
+    return scale_meal(
+        snapshot,
+        selection,
+        target_calories,
+        min_scale=settings.plan_portion_min_scale,
+        max_scale=settings.plan_portion_max_scale,
+    )
+
 
+def _missing_meals(foods_by_meal: Dict[MealType, np.ndarray]) -> List[MealType]:
+    return [meal for meal in MEAL_DISTRIBUTION if foods_by_meal.get(meal, _EMPTY_SELECTION).size == 0]
 
-async def generate_weekly_plan(
-    user: UserInDB,
-    foods_collection: AsyncIOMotorCollection,
+
+def _build_weekly_plan(
+    snapshot: CatalogSnapshot,
+    foods_by_meal: Dict[MealType, np.ndarray],
+    daily_target: int,
+    deadline: Optional[PlanDeadline] = None,
+    rng: Optional[random.Random] = None,
 ) -> List[DailyMeals]:
-    daily_target = _calculate_daily_calories(user)
-    foods_by_meal = await _load_foods_for_user(foods_collection, user.dietType)
-    missing_meals = [meal for meal in MEAL_DISTRIBUTION if not foods_by_meal.get(meal)]
-    if missing_meals:
-        missing_str = ", ".join(missing_meals)
-        raise ValueError(f"Insufficient food items for: {missing_str}. Seed more options.")
-    used_food_ids: set[str] = set()
+    used = np.zeros(snapshot.size, dtype=bool)
+    entries = snapshot.entries
+    scaling = get_settings().plan_portion_scaling
+    portions = get_portion_table() if scaling and snapshot.fdc_ids.any() else None
     week_plan: List[DailyMeals] = []
 
     for day in DAYS_OF_WEEK:
         daily_meals: Dict[MealType, List[MealEntry]] = {}
+        day_nutrients: List[np.ndarray] = []
+        total_calories = 0
         for meal_type, ratio in MEAL_DISTRIBUTION.items():
             target = daily_target * ratio
-            entries = _choose_meal_items(foods_by_meal.get(meal_type, []), used_food_ids, target)
-            daily_meals[meal_type] = entries
-
-        macro_totals = _compute_macro_totals(daily_meals)
-        total_calories = sum(entry.calories for meals in daily_meals.values() for entry in meals)
+            selection = _select_meal(snapshot, foods_by_meal[meal_type], used, target, deadline, rng)
+            if scaling:
+                meal = _portion_meal(snapshot, selection, target)
+                daily_meals[meal_type] = scaled_entries(snapshot, meal, portions)
+                day_nutrients.append(meal.nutrients)
+            else:
+                daily_meals[meal_type] = [entries[row] for row in selection.tolist()]
+                day_nutrients.append(snapshot.nutrients[selection])
+            total_calories += sum(int(entry.calories) for entry in daily_meals[meal_type])
+
+        macro_totals = _compute_macro_totals(np.concatenate(day_nutrients))
         if total_calories == 0:
             total_calories = daily_target
 
         week_plan.append(
-            DailyMeals(
+            DailyMeals.model_construct(
                 day=day,
                 meals=daily_meals,
                 totalCalories=total_calories,
@@ -166,57 +238,143 @@ async def generate_weekly_plan(
     return week_plan
 
 
+def profile_fingerprint(user: UserInDB) -> str:
+    """Stable hash of every profile field that influences plan generation."""
+    values = (getattr(user, field, None) for field in _PROFILE_FIELDS)
+    # Numbers are normalised so stored ints and validated floats hash the same.
+    raw = "|".join(repr(float(value)) if isinstance(value, (int, float)) else repr(value) for value in values)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+def derive_plan_seed(fingerprint: str, catalog_version: int) -> int:
+    digest = hashlib.sha256(f"{fingerprint}:{catalog_version}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def get_plan_memo() -> TTLCache[List[DailyMeals]]:
+    global _plan_memo
+    if _plan_memo is None:
+        settings = get_settings()
+        _plan_memo = TTLCache(settings.plan_cache_size, settings.plan_cache_ttl_seconds)
+    return _plan_memo
+
+
+async def generate_weekly_plan(
+    user: UserInDB,
+    foods_collection: AsyncIOMotorCollection,
+    *,
+    seed: Optional[int] = None,
+) -> List[DailyMeals]:
+    """Build a week of meals for ``user``.
+
+    With an explicit ``seed`` (or ``DETERMINISTIC_PLANS`` enabled, which derives one
+    from the profile and catalog version) the plan is reproducible and memoized.
+    """
+    daily_target = _resolve_calorie_target(user)
+    snapshot, foods_by_meal = await _load_foods_for_user(foods_collection, user.dietType)
+    missing_meals = _missing_meals(foods_by_meal)
+    if missing_meals:
+        missing_str = ", ".join(missing_meals)
+        raise ValueError(f"Insufficient food items for: {missing_str}. Seed more options.")
+
+    settings = get_settings()
+    memo_key = None
+    if seed is not None or settings.deterministic_plans:
+        fingerprint = profile_fingerprint(user)
+        if seed is None:
+            seed = derive_plan_seed(fingerprint, snapshot.version)
+        memo_key = (fingerprint, snapshot.version, seed, settings.plan_optimizer, settings.plan_portion_scaling)
+        cached = get_plan_memo().get(memo_key)
+        if cached is not None:
+            return list(cached)
+
+    with PlanCpuTimer("weekly"):
+        week_plan = _build_weekly_plan(
+            snapshot, foods_by_meal, daily_target, _new_plan_deadline(), random.Random(seed)
+        )
+    if memo_key is not None:
+        get_plan_memo().set(memo_key, week_plan)
+    return list(week_plan)
+
+
 async def generate_7day_plan(
     user: UserInDB,
     foods_collection: AsyncIOMotorCollection,
     *,
     include_descriptions: bool = False,
+    seed: Optional[int] = None,
 ) -> List[Dict[str, Any]]:
     """Generate a 7-day meal schedule tailored to the user's preferences."""
 
     daily_target = _resolve_calorie_target(user)
     diet_filters = _resolve_diet_filters(getattr(user, "dietType", "balanced"))
-    foods_by_meal = await _load_foods_for_preferences(foods_collection, diet_filters)
+    snapshot, foods_by_meal = await _load_foods_for_preferences(foods_collection, diet_filters)
 
-    missing_meals = [meal for meal in MEAL_DISTRIBUTION if not foods_by_meal.get(meal)]
+    missing_meals = _missing_meals(foods_by_meal)
     if missing_meals:
         missing_str = ", ".join(sorted(missing_meals))
         raise ValueError(f"Insufficient food items for: {missing_str}. Seed more options.")
 
-    used_food_ids: set[str] = set()
+    used = np.zeros(snapshot.size, dtype=bool)
+    deadline = _new_plan_deadline()
+    rng = random.Random(seed)
     weekly_plan: List[Dict[str, Any]] = []
 
-    for day_name in DAYS_OF_WEEK:
-        day_meals: Dict[str, List[str]] = {}
-        day_calories = 0
-
-        for meal_type, ratio in MEAL_DISTRIBUTION.items():
-            entries = _choose_meal_items(
-                foods_by_meal.get(meal_type, []),
-                used_food_ids,
-                daily_target * ratio,
+    with PlanCpuTimer("7day"):
+        for day_name in DAYS_OF_WEEK:
+            day_meals: Dict[str, List[str]] = {}
+            day_calories = 0
+
+            for meal_type, ratio in MEAL_DISTRIBUTION.items():
+                selection = _select_meal(
+                    snapshot,
+                    foods_by_meal[meal_type],
+                    used,
+                    daily_target * ratio,
+                    deadline,
+                    rng,
+                )
+                rows = selection.tolist()
+                day_meals[meal_type] = [snapshot.names[row] for row in rows]
+                # Only names are shown here, so the total counts one serving of each.
+                day_calories += sum(int(snapshot.entries[row].calories) for row in rows)
+
+            if day_calories == 0:
+                day_calories = daily_target
+
+            weekly_plan.append(
+                {
+                    "day": day_name,
+                    "meals": day_meals,
+                    "totalCalories": day_calories,
+                }
             )
-            meal_names = [entry.name for entry in entries]
-            day_meals[meal_type] = meal_names
-            day_calories += sum(entry.calories for entry in entries)
 
-        if day_calories == 0:
-            day_calories = daily_target
+    if include_descriptions:
+        await _attach_day_descriptions(weekly_plan)
+
+    return weekly_plan
 
-        day_payload: Dict[str, Any] = {
-            "day": day_name,
-            "meals": day_meals,
-            "totalCalories": day_calories,
-        }
 
-        if include_descriptions:
-            description = await _maybe_generate_day_description(day_payload)
-            if description:
-                day_payload["description"] = description
+async def _attach_day_descriptions(weekly_plan: List[Dict[str, Any]]) -> None:
+    """Describe every day concurrently; days still pending at the deadline go without."""
+    settings = get_settings()
+    deadline = settings.plan_description_deadline_seconds
+    semaphore = asyncio.Semaphore(settings.plan_description_concurrency)
 
-        weekly_plan.append(day_payload)
+    async def describe(day_payload: Dict[str, Any]) -> None:
+        async with semaphore:
+            description = await _maybe_generate_day_description(day_payload, timeout=deadline)
+        if description:
+            day_payload["description"] = description
 
-    return weekly_plan
+    tasks = [asyncio.create_task(describe(day_payload)) for day_payload in weekly_plan]
+    _done, pending = await asyncio.wait(tasks, timeout=deadline)
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+        _LOGGER.info("Skipped %s day descriptions that missed the %.1fs deadline", len(pending), deadline)
 
 
 def _resolve_calorie_target(user: UserInDB) -> int:
@@ -245,35 +403,29 @@ def _resolve_diet_filters(diet_type: str) -> List[str]:
 async def _load_foods_for_preferences(
     foods_collection: AsyncIOMotorCollection,
     diet_filters: List[str],
-) -> Dict[MealType, List[FoodInDB]]:
-    meals: Dict[MealType, List[FoodInDB]] = defaultdict(list)
-    cursor = foods_collection.find({"type": {"$in": diet_filters}})
+) -> Tuple[CatalogSnapshot, Dict[MealType, np.ndarray]]:
+    snapshot = await get_food_catalog().get(foods_collection)
+    return snapshot, snapshot.candidates_by_meal(diet_filters)
 
-    async for item in cursor:
-        food = FoodInDB(**item)
-        for meal_type in food.mealType:
-            meals[meal_type].append(food)
 
-    return meals
-
-
-async def _maybe_generate_day_description(day_payload: Dict[str, Any]) -> Optional[str]:
+async def _maybe_generate_day_description(
+    day_payload: Dict[str, Any], timeout: Optional[float] = None
+) -> Optional[str]:
     prompt = (
         "Summarize the following daily meal plan in one friendly sentence (max 40 words). "
         "Highlight the variety and how it supports healthy eating.\n"
         f"Plan: {json.dumps(day_payload, ensure_ascii=False)}"
     )
 
-    description = await asyncio.to_thread(_call_gemini, prompt)
+    description = await _call_gemini(prompt, timeout=timeout)
     return description
 
 
-def _call_gemini(prompt: str) -> Optional[str]:
-    settings = get_settings()
-    if not settings.gemini_api_key or not settings.gemini_model:
+async def _call_gemini(prompt: str, timeout: Optional[float] = None) -> Optional[str]:
+    client = get_llm_client()
+    if client is None:
         return None
 
-    endpoint = f"{_GEMINI_API_ROOT}/models/{settings.gemini_model}:generateContent"
     payload = {
         "contents": [
             {
@@ -287,25 +439,8 @@ def _call_gemini(prompt: str) -> Optional[str]:
         ]
     }
 
-    try:
-        response = requests.post(
-            endpoint,
-            params={"key": settings.gemini_api_key},
-            json=payload,
-            timeout=30,
-        )
-    except Exception as exc:  # pragma: no cover
-        _LOGGER.warning("Gemini request failed: %s", exc)
-        return None
-
-    if response.status_code != 200:
-        _LOGGER.warning("Gemini API returned %s: %s", response.status_code, response.text)
-        return None
-
-    try:
-        data = response.json()
-    except ValueError as exc:  # pragma: no cover
-        _LOGGER.warning("Failed to decode Gemini response: %s", exc)
+    data = await client.generate_content(payload, timeout=timeout, caller="diet_generator")
+    if data is None:
         return None
 
     return _extract_text_from_gemini_response(data)
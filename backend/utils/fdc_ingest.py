@@ -0,0 +1,222 @@
+import argparse
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pymongo import MongoClient, UpdateOne
+
+if __package__ in (None, ""):
+    # Allow `python utils/fdc_ingest.py` from the backend directory.
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.fdc_tables import (
+    DEFAULT_ATWATER,
+    FDC_DATA_DIR,
+    SNAPSHOT_DIR,
+    FdcReader,
+    FdcSource,
+    MissingFdcTablesError,
+    Portion,
+    open_fdc_tables,
+    require_tables,
+)
+from utils.food_catalog import bump_catalog_version
+from utils.indexes import INDEXES
+from utils.settings import get_settings
+
+REFERENCE_GRAMS = 100.0
+
+_NON_VEG_CATEGORIES = {
+    "Poultry Products",
+    "Sausages and Luncheon Meats",
+    "Pork Products",
+    "Beef Products",
+    "Finfish and Shellfish Products",
+    "Lamb, Veal, and Game Products",
+}
+_VEGAN_CATEGORIES = {
+    "Vegetables and Vegetable Products",
+    "Fruits and Fruit Juices",
+    "Legumes and Legume Products",
+    "Nut and Seed Products",
+    "Cereal Grains and Pasta",
+    "Spices and Herbs",
+}
+_NON_VEG_WORDS = {
+    "chicken",
+    "beef",
+    "pork",
+    "turkey",
+    "lamb",
+    "fish",
+    "salmon",
+    "tuna",
+    "shrimp",
+    "ham",
+    "bacon",
+    "sausage",
+}
+_BREAKFAST_CATEGORIES = {"Dairy and Egg Products", "Breakfast Cereals", "Fruits and Fruit Juices", "Baked Products"}
+_SNACK_CATEGORIES = {"Nut and Seed Products", "Fruits and Fruit Juices", "Snacks", "Sweets", "Dairy and Egg Products"}
+
+
+@dataclass
+class IngestResult:
+    rows_read: int = 0
+    foods_seen: int = 0
+    foods_built: int = 0
+    skipped: int = 0
+    written: int = 0
+    elapsed_seconds: float = 0.0
+    missing_tables: List[str] = field(default_factory=list)
+
+    @property
+    def rows_per_second(self) -> float:
+        return round(self.rows_read / self.elapsed_seconds, 2) if self.elapsed_seconds else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "rows_per_second": self.rows_per_second}
+
+
+def _classify(name: str, category: Optional[str]) -> Tuple[str, List[str]]:
+    """Diet type and meal types for a raw food, from its FDC category or, failing that, its name."""
+    words = set(name.lower().replace("(", " ").replace(")", " ").replace(",", " ").split())
+    if category in _NON_VEG_CATEGORIES or words & _NON_VEG_WORDS:
+        diet = "non_veg"
+    elif category in _VEGAN_CATEGORIES:
+        diet = "vegan"
+    elif category == "Dairy and Egg Products":
+        diet = "veg"
+    else:
+        diet = "balanced"
+
+    meals = ["lunch", "dinner"]
+    if category in _BREAKFAST_CATEGORIES:
+        meals.insert(0, "breakfast")
+    if category in _SNACK_CATEGORIES or category is None:
+        meals.append("snacks")
+    return diet, meals
+
+
+def atwater_calories(macros: Dict[str, float], factors: Tuple[float, float, float]) -> float:
+    protein_factor, fat_factor, carb_factor = factors
+    return (
+        macros.get("protein", 0.0) * protein_factor
+        + macros.get("fat", 0.0) * fat_factor
+        + macros.get("carbs", 0.0) * carb_factor
+    )
+
+
+def iter_fdc_foods(reader: FdcSource, result: IngestResult) -> Iterator[Dict[str, Any]]:
+    """Yield one ``foods`` document per foundation food that has macro data, scaled to its default portion."""
+    fdc_ids = set(reader.foundation_ids())
+    result.foods_seen = len(fdc_ids)
+    names, categories = reader.food_details(fdc_ids)
+    factors = reader.calorie_factors(fdc_ids)
+    portions = reader.default_portions(fdc_ids)
+    macros = reader.macros_per_100g(fdc_ids)
+
+    for fdc_id in sorted(fdc_ids):
+        food_macros = macros.get(fdc_id)
+        name = names.get(fdc_id)
+        if not food_macros or not name:
+            result.skipped += 1
+            continue
+        portion = portions.get(fdc_id) or Portion(grams=REFERENCE_GRAMS, description=f"{REFERENCE_GRAMS:g} g")
+        scale = portion.grams / REFERENCE_GRAMS
+        diet, meals = _classify(name, categories.get(fdc_id))
+        result.foods_built += 1
+        yield {
+            "fdcId": fdc_id,
+            "food": name[:1].upper() + name[1:],
+            "calories": int(round(atwater_calories(food_macros, factors.get(fdc_id, DEFAULT_ATWATER)) * scale)),
+            "protein": round(food_macros.get("protein", 0.0) * scale, 1),
+            "carbs": round(food_macros.get("carbs", 0.0) * scale, 1),
+            "fat": round(food_macros.get("fat", 0.0) * scale, 1),
+            "type": diet,
+            "mealType": meals,
+            "portion": {"description": portion.description, "grams": portion.grams},
+            "category": categories.get(fdc_id),
+            "source": "fdc",
+        }
+
+
+def _batches(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    batch: List[Any] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def ingest_fdc_foods(db=None, reader: Optional[FdcSource] = None, batch_size: Optional[int] = None) -> IngestResult:
+    """Upsert FDC foods keyed on ``fdcId`` using a synchronous PyMongo ``db``; ``db=None`` is a dry run.
+
+    Reads the compiled snapshot when it is up to date, otherwise the CSVs.
+    Raises ``MissingFdcTablesError`` before writing when a required table is missing.
+    """
+    reader = reader or open_fdc_tables()
+    require_tables(reader)
+    batch_size = batch_size or get_settings().batch_write_size
+    result = IngestResult()
+    started = time.perf_counter()
+
+    if db is not None:
+        db["foods"].create_indexes([spec.model() for spec in INDEXES if spec.collection == "foods"])
+    for batch in _batches(iter_fdc_foods(reader, result), batch_size):
+        if db is None:
+            continue
+        if not result.written:
+            # Bump before the first write as well, so a seed being staged notices it.
+            bump_catalog_version(db)
+        write = db["foods"].bulk_write(
+            [UpdateOne({"fdcId": doc["fdcId"]}, {"$set": doc}, upsert=True) for doc in batch], ordered=False
+        )
+        result.written += write.upserted_count + write.matched_count
+    if db is not None and result.written:
+        bump_catalog_version(db)
+
+    result.rows_read = reader.rows_read
+    result.missing_tables = reader.missing_tables
+    result.elapsed_seconds = time.perf_counter() - started
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Ingest USDA FoodData Central foundation foods.")
+    parser.add_argument("--data-dir", type=Path, default=FDC_DATA_DIR)
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--csv", action="store_true", help="Parse the CSVs even if a fresh snapshot exists")
+    parser.add_argument("--dry-run", action="store_true", help="Parse and join without writing to MongoDB")
+    args = parser.parse_args()
+
+    reader = FdcReader(args.data_dir) if args.csv else open_fdc_tables(args.data_dir, SNAPSHOT_DIR)
+    try:
+        if args.dry_run:
+            result = ingest_fdc_foods(None, reader, args.batch_size)
+        else:
+            settings = get_settings()
+            client = MongoClient(settings.mongo_uri)
+            try:
+                result = ingest_fdc_foods(client[settings.mongo_db_name], reader, args.batch_size)
+            finally:
+                client.close()
+    except MissingFdcTablesError as exc:
+        sys.exit(f"❌ {exc}")
+
+    if result.missing_tables:
+        print(f"⚠️  Missing tables: {', '.join(sorted(set(result.missing_tables)))}")
+    print(
+        f"✅ Read {result.rows_read} rows in {result.elapsed_seconds:.2f}s ({result.rows_per_second} rows/s); "
+        f"{result.foods_built}/{result.foods_seen} foods built, {result.skipped} skipped without name or macros, "
+        f"{result.written} written"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+
+from models.food_model import MealType
+from models.mealplan_model import MealEntry
+from utils.settings import get_settings
+
+_LOGGER = logging.getLogger(__name__)
+
+CATALOG_META_COLLECTION = "catalog_meta"
+CATALOG_META_ID = "foods"
+
+
+MEAL_BITS: Dict[MealType, int] = {
+    "breakfast": 1,
+    "lunch": 2,
+    "dinner": 4,
+    "snacks": 8,
+}
+
+DIET_BITS: Dict[str, int] = {
+    "veg": 1,
+    "non_veg": 2,
+    "vegan": 4,
+    "keto": 8,
+    "paleo": 16,
+    "balanced": 32,
+}
+
+# Column order of CatalogSnapshot.nutrients.
+NUTRIENT_COLUMNS = ("calories", "protein", "carbs", "fat")
+
+_CATALOG_PROJECTION = {
+    "food": 1,
+    "calories": 1,
+    "protein": 1,
+    "carbs": 1,
+    "fat": 1,
+    "mealType": 1,
+    "type": 1,
+    "fdcId": 1,
+    "portion.grams": 1,
+}
+
+
+def diet_mask_for(diet_filters: Iterable[str]) -> int:
+    mask = 0
+    for diet_type in diet_filters:
+        mask |= DIET_BITS.get(diet_type, 0)
+    return mask
+
+
+@dataclass
+class CatalogSnapshot:
+    """Columnar, read-only view of the foods collection.
+
+    Foods are addressed by their row index. ``nutrients`` holds one row per food
+    with the columns in ``NUTRIENT_COLUMNS``; meal and diet membership are bitmasks
+    built from ``MEAL_BITS`` and ``DIET_BITS``. ``serving_grams`` is the weight of
+    one listed serving (NaN when unknown) and ``fdc_ids`` links foods ingested
+    from FoodData Central (0 otherwise).
+    """
+
+    version: int
+    loaded_at: float
+    ids: List[str]
+    names: List[str]
+    nutrients: np.ndarray
+    meal_mask: np.ndarray
+    diet_mask: np.ndarray
+    entries: List[MealEntry]
+    serving_grams: np.ndarray
+    fdc_ids: np.ndarray
+    _candidates: Dict[Tuple[int, int], np.ndarray] = field(default_factory=dict, repr=False)
+    _per_gram: Optional[np.ndarray] = field(default=None, repr=False)
+    _rows_by_id: Optional[Dict[str, int]] = field(default=None, repr=False)
+
+    @property
+    def size(self) -> int:
+        return len(self.ids)
+
+    @property
+    def calories(self) -> np.ndarray:
+        return self.nutrients[:, 0]
+
+    @property
+    def per_gram(self) -> np.ndarray:
+        """Nutrients per gram in ``NUTRIENT_COLUMNS`` order; NaN rows where the serving weight is unknown."""
+        if self._per_gram is None:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                per_gram = np.ascontiguousarray(self.nutrients / self.serving_grams[:, None])
+            per_gram.setflags(write=False)
+            self._per_gram = per_gram
+        return self._per_gram
+
+    @property
+    def rows_by_id(self) -> Dict[str, int]:
+        """Row index of each food id, built on first use."""
+        if self._rows_by_id is None:
+            self._rows_by_id = {food_id: row for row, food_id in enumerate(self.ids)}
+        return self._rows_by_id
+
+    def candidates(self, meal_type: MealType, diet_mask: int) -> np.ndarray:
+        """Row indices of foods served at ``meal_type`` that match any diet bit in ``diet_mask``."""
+        key = (MEAL_BITS[meal_type], diet_mask)
+        indices = self._candidates.get(key)
+        if indices is None:
+            matches = ((self.meal_mask & key[0]) != 0) & ((self.diet_mask & diet_mask) != 0)
+            indices = np.flatnonzero(matches)
+            indices.setflags(write=False)
+            self._candidates[key] = indices
+        return indices
+
+    def candidates_by_meal(self, diet_filters: Sequence[str]) -> Dict[MealType, np.ndarray]:
+        diet_mask = diet_mask_for(diet_filters)
+        return {meal_type: self.candidates(meal_type, diet_mask) for meal_type in MEAL_BITS}
+
+
+class FoodCatalogCache:
+    """Process-wide catalog cache refreshed on TTL expiry or catalog version bumps."""
+
+    def __init__(self, ttl_seconds: float) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.reloads = 0
+        self.invalidations = 0
+
+    @property
+    def snapshot(self) -> Optional[CatalogSnapshot]:
+        return self._snapshot
+
+    async def get(self, foods_collection: AsyncIOMotorCollection) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() < self._expires_at:
+            self.hits += 1
+            return snapshot
+
+        async with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and time.monotonic() < self._expires_at:
+                self.hits += 1
+                return snapshot
+
+            self.misses += 1
+            version = await read_catalog_version(foods_collection.database)
+            if snapshot is not None and snapshot.version == version:
+                # Catalog unchanged since the last load: extend the lease without re-reading foods.
+                self.revalidations += 1
+            else:
+                snapshot = await _load_snapshot(foods_collection, version)
+                self._snapshot = snapshot
+                self.reloads += 1
+                _LOGGER.info("Loaded food catalog v%s with %s items", version, snapshot.size)
+            self._expires_at = time.monotonic() + self.ttl_seconds
+            return snapshot
+
+    def prime(self, snapshot: CatalogSnapshot) -> None:
+        """Install ``snapshot`` directly, e.g. for offline tools and benchmarks."""
+        self._snapshot = snapshot
+        self._expires_at = time.monotonic() + self.ttl_seconds
+
+    def invalidate(self) -> None:
+        self._expires_at = 0.0
+        self.invalidations += 1
+
+    def clear(self) -> None:
+        self._snapshot = None
+        self._expires_at = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        lookups = self.hits + self.misses
+        return {
+            "version": snapshot.version if snapshot else None,
+            "size": snapshot.size if snapshot else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "revalidations": self.revalidations,
+            "reloads": self.reloads,
+            "invalidations": self.invalidations,
+            "ttlSeconds": self.ttl_seconds,
+        }
+
+
+async def _load_snapshot(foods_collection: AsyncIOMotorCollection, version: int) -> CatalogSnapshot:
+    documents = [item async for item in foods_collection.find({}, _CATALOG_PROJECTION)]
+    return build_snapshot(documents, version)
+
+
+def build_snapshot(documents: Iterable[Dict[str, Any]], version: int = 0) -> CatalogSnapshot:
+    """Build a snapshot from raw food documents (``_id`` is optional)."""
+    ids: List[str] = []
+    names: List[str] = []
+    rows: List[Tuple[float, float, float, float]] = []
+    meal_masks: List[int] = []
+    diet_masks: List[int] = []
+    serving_grams: List[float] = []
+    fdc_ids: List[int] = []
+
+    for index, item in enumerate(documents):
+        meal_mask = 0
+        for meal_type in item.get("mealType") or []:
+            meal_mask |= MEAL_BITS.get(meal_type, 0)
+        ids.append(str(item.get("_id", index)))
+        names.append(item["food"])
+        rows.append(
+            (
+                item.get("calories") or 0,
+                item.get("protein") or 0,
+                item.get("carbs") or 0,
+                item.get("fat") or 0,
+            )
+        )
+        meal_masks.append(meal_mask)
+        diet_masks.append(DIET_BITS.get(item.get("type", "balanced"), 0))
+        serving_grams.append((item.get("portion") or {}).get("grams") or np.nan)
+        fdc_ids.append(item.get("fdcId") or 0)
+
+    nutrients = np.array(rows, dtype=np.float64).reshape(-1, len(NUTRIENT_COLUMNS))
+    nutrients.setflags(write=False)
+    entries = [
+        MealEntry.model_construct(
+            name=name,
+            foodId=food_id,
+            calories=int(row[0]),
+            protein=float(row[1]),
+            carbs=float(row[2]),
+            fat=float(row[3]),
+        )
+        for food_id, name, row in zip(ids, names, rows)
+    ]
+
+    return CatalogSnapshot(
+        version=version,
+        loaded_at=time.time(),
+        ids=ids,
+        names=names,
+        nutrients=nutrients,
+        meal_mask=np.array(meal_masks, dtype=np.uint8),
+        diet_mask=np.array(diet_masks, dtype=np.uint8),
+        entries=entries,
+        serving_grams=np.array(serving_grams, dtype=np.float64),
+        fdc_ids=np.array(fdc_ids, dtype=np.int64),
+    )
+
+
+async def read_catalog_version(db: AsyncIOMotorDatabase) -> int:
+    meta = await db[CATALOG_META_COLLECTION].find_one({"_id": CATALOG_META_ID}, {"version": 1})
+    return int(meta.get("version", 0)) if meta else 0
+
+
+def current_catalog_version(db) -> int:
+    """``read_catalog_version`` for a synchronous PyMongo database handle."""
+    meta = db[CATALOG_META_COLLECTION].find_one({"_id": CATALOG_META_ID}, {"version": 1})
+    return int(meta.get("version", 0)) if meta else 0
+
+
+def bump_catalog_version(db) -> int:
+    """Increment the catalog version using a synchronous PyMongo database handle."""
+    meta = db[CATALOG_META_COLLECTION].find_one_and_update(
+        {"_id": CATALOG_META_ID},
+        {"$inc": {"version": 1}, "$set": {"updatedAt": datetime.now(tz=timezone.utc)}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return int(meta["version"])
+
+
+_catalog_cache: Optional[FoodCatalogCache] = None
+_watch_task: Optional[asyncio.Task] = None
+
+
+def get_food_catalog() -> FoodCatalogCache:
+    global _catalog_cache
+    if _catalog_cache is None:
+        _catalog_cache = FoodCatalogCache(ttl_seconds=get_settings().catalog_ttl_seconds)
+    return _catalog_cache
+
+
+async def _watch_catalog_changes(db: AsyncIOMotorDatabase) -> None:
+    catalog = get_food_catalog()
+    try:
+        async with db[CATALOG_META_COLLECTION].watch() as stream:
+            async for _change in stream:
+                _LOGGER.info("Catalog version changed, invalidating food catalog cache")
+                catalog.invalidate()
+    except asyncio.CancelledError:
+        raise
+    except PyMongoError as exc:
+        # Change streams need a replica set; standalone servers fall back to TTL expiry.
+        _LOGGER.info("Catalog change stream unavailable, relying on TTL refresh: %s", exc)
+
+
+def start_catalog_watcher(db: AsyncIOMotorDatabase) -> None:
+    global _watch_task
+    if _watch_task is not None or not get_settings().catalog_change_stream:
+        return
+    _watch_task = asyncio.get_running_loop().create_task(_watch_catalog_changes(db))
+
+
+async def stop_catalog_watcher() -> None:
+    global _watch_task
+    task, _watch_task = _watch_task, None
+    if task is None:
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
@@ -0,0 +1,261 @@
+import asyncio
+import logging
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from utils.food_catalog import CatalogSnapshot
+
+_LOGGER = logging.getLogger(__name__)
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+# Upper bound on distinct words expanded for a short autocomplete prefix.
+_MAX_PREFIX_WORDS = 256
+
+# ``best_match`` rejects names whose words cover less of the query than this.
+MIN_MATCH_SCORE = 0.75
+_FILLER_WORDS = frozenset({"a", "an", "the", "of", "with", "and", "in", "on", "for", "some", "my"})
+
+
+def _normalize(text: str) -> str:
+    return " ".join(_WORD_RE.findall(text.lower()))
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _dice(left: Set[str], right: Set[str]) -> float:
+    return 2 * len(left & right) / (len(left) + len(right))
+
+
+def _intersect_sorted(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Intersection of two sorted, duplicate-free arrays, probing the larger with the smaller."""
+    if left.size > right.size:
+        left, right = right, left
+    if not left.size:
+        return left
+    positions = np.minimum(np.searchsorted(right, left), right.size - 1)
+    return left[right[positions] == left]
+
+
+class FoodNameIndex:
+    """Prefix and trigram index over the food names of one catalog snapshot.
+
+    ``autocomplete`` ranks whole-name prefix matches first, then names with a
+    word starting with the query, then names matching the query after
+    trigram-based spelling correction of each word; ties go to the shorter
+    name. ``best_match`` returns the single closest name for free-text
+    lookups, or nothing when that name covers too little of the query.
+    """
+
+    def __init__(self, snapshot: CatalogSnapshot) -> None:
+        self.snapshot = snapshot
+        self._names = [_normalize(name) for name in snapshot.names]
+
+        self._sorted_names = sorted((name, row) for row, name in enumerate(self._names))
+        self._name_keys = [name for name, _ in self._sorted_names]
+
+        # Word postings hold length ranks rather than rows, so the head of any
+        # posting (or intersection of postings) is already the best suggestion.
+        self._rank_rows = np.array(
+            sorted(range(len(self._names)), key=lambda row: (len(self._names[row]), self._names[row])), dtype=np.int32
+        )
+        row_rank = np.empty_like(self._rank_rows)
+        row_rank[self._rank_rows] = np.arange(self._rank_rows.size, dtype=np.int32)
+
+        word_ranks: Dict[str, List[int]] = defaultdict(list)
+        for row, name in enumerate(self._names):
+            for word in set(name.split()):
+                word_ranks[word].append(int(row_rank[row]))
+
+        self._words = sorted(word_ranks)
+        self._word_ranks = [np.array(sorted(word_ranks[word]), dtype=np.int32) for word in self._words]
+        self._word_positions = {word: position for position, word in enumerate(self._words)}
+
+        # Trigram index over the word vocabulary, used to correct misspelled query words.
+        gram_words: Dict[str, List[int]] = defaultdict(list)
+        self._word_gram_counts = np.zeros(len(self._words), dtype=np.int32)
+        for position, word in enumerate(self._words):
+            grams = _trigrams(word)
+            self._word_gram_counts[position] = len(grams)
+            for gram in grams:
+                gram_words[gram].append(position)
+        self._gram_words = {gram: np.array(positions, dtype=np.int32) for gram, positions in gram_words.items()}
+
+    def _prefix_rows(self, prefix: str, limit: int) -> List[int]:
+        rows = []
+        start = bisect_left(self._name_keys, prefix)
+        for name, row in self._sorted_names[start : start + limit]:
+            if not name.startswith(prefix):
+                break
+            rows.append(row)
+        return rows
+
+    def _word_prefix_rows(self, words: List[str], limit: int) -> List[int]:
+        """Names containing every complete word and a word starting with the last one."""
+        *complete, partial = words
+        required: Optional[np.ndarray] = None
+        for word in complete:
+            position = self._word_positions.get(word)
+            if position is None:
+                return []
+            ranks = self._word_ranks[position]
+            required = ranks if required is None else _intersect_sorted(required, ranks)
+            if not required.size:
+                return []
+
+        heads = []
+        start = bisect_left(self._words, partial)
+        for position in range(start, min(start + _MAX_PREFIX_WORDS, len(self._words))):
+            if not self._words[position].startswith(partial):
+                break
+            ranks = self._word_ranks[position]
+            if required is not None:
+                ranks = _intersect_sorted(required, ranks)
+            heads.append(ranks[:limit])
+        if not heads:
+            return []
+        return self._rank_rows[np.unique(np.concatenate(heads))[:limit]].tolist()
+
+    def similar_words(self, word: str, limit: int = 3, min_similarity: float = 0.4) -> List[int]:
+        """Vocabulary positions of ``word`` itself, or of its closest spellings by trigram Dice."""
+        position = self._word_positions.get(word)
+        if position is not None:
+            return [position]
+        grams = _trigrams(word)
+        postings = [self._gram_words[gram] for gram in grams if gram in self._gram_words]
+        if not postings:
+            return []
+        positions, shared = np.unique(np.concatenate(postings), return_counts=True)
+        scores = 2 * shared / (len(grams) + self._word_gram_counts[positions])
+        best = np.argsort(-scores, kind="stable")[:limit]
+        # Keep only spellings about as close as the best one.
+        cutoff = max(min_similarity, 0.9 * float(scores[best[0]]))
+        return positions[best[scores[best] >= cutoff]].tolist()
+
+    def fuzzy(self, query: str, limit: int) -> List[int]:
+        """Rows containing as many (spelling-corrected) query words as possible, shortest first.
+
+        Words are intersected from the most to the least selective; a word
+        that would empty the result is skipped rather than failing the match.
+        """
+        alternatives = []
+        for word in query.split():
+            positions = self.similar_words(word)
+            if positions:
+                alternatives.append([self._word_ranks[position] for position in positions])
+        if not alternatives:
+            return []
+
+        # Union of corrected spellings is taken only after narrowing, since a
+        # misspelled stop word can expand to postings covering most of the catalog.
+        alternatives.sort(key=lambda postings: sum(len(ranks) for ranks in postings))
+        matched: Optional[np.ndarray] = None
+        for postings in alternatives:
+            if matched is None:
+                matched = postings[0] if len(postings) == 1 else np.unique(np.concatenate(postings))
+                continue
+            narrowed = [_intersect_sorted(matched, ranks) for ranks in postings]
+            narrowed = narrowed[0] if len(narrowed) == 1 else np.unique(np.concatenate(narrowed))
+            if narrowed.size:
+                matched = narrowed
+        return self._rank_rows[matched[:limit]].tolist()
+
+    def autocomplete(self, query: str, limit: int = 10) -> List[int]:
+        normalized = _normalize(query)
+        if not normalized or limit <= 0:
+            return []
+
+        results: List[int] = []
+        seen: Set[int] = set()
+
+        def extend(rows: List[int]) -> None:
+            for row in rows:
+                if row not in seen and len(results) < limit:
+                    seen.add(row)
+                    results.append(row)
+
+        extend(self._prefix_rows(normalized, limit))
+        if len(results) < limit:
+            extend(self._word_prefix_rows(normalized.split(), limit))
+        if len(results) < limit and len(normalized) >= 3:
+            extend(self.fuzzy(normalized, limit))
+        return results
+
+    def match_score(self, query: str, row: int) -> float:
+        """How well the name at ``row`` covers ``query``, from 0 to 1.
+
+        Each query word except filler words scores 1 against a name word it
+        equals or starts, otherwise its best trigram Dice; the score is their mean.
+        """
+        words = [word for word in _normalize(query).split() if word not in _FILLER_WORDS]
+        if not words:
+            return 0.0
+        name_words = [(word, _trigrams(word)) for word in self._names[row].split()]
+        if not name_words:
+            return 0.0
+        total = 0.0
+        for word in words:
+            grams = _trigrams(word)
+            total += max(
+                1.0 if name_word.startswith(word) else _dice(grams, name_grams) for name_word, name_grams in name_words
+            )
+        return total / len(words)
+
+    def best_match(self, query: str, min_score: float = MIN_MATCH_SCORE) -> Optional[int]:
+        """Row of the closest name, or ``None`` when even that one covers less than ``min_score`` of the query."""
+        normalized = _normalize(query)
+        if not normalized:
+            return None
+        exact = self._prefix_rows(normalized, 1)
+        if exact and self._names[exact[0]] == normalized:
+            return exact[0]
+        matches = self.fuzzy(normalized, 1) or self._word_prefix_rows(normalized.split(), 1)
+        if matches and self.match_score(normalized, matches[0]) >= min_score:
+            return matches[0]
+        return None
+
+
+_name_index: Optional[FoodNameIndex] = None
+_pending: Optional[Tuple[CatalogSnapshot, "asyncio.Future[FoodNameIndex]"]] = None
+
+
+def _install_index(build: "asyncio.Future[FoodNameIndex]") -> None:
+    global _name_index, _pending
+    if _pending is not None and _pending[1] is build:
+        _pending = None
+    if build.cancelled():
+        return
+    if build.exception() is not None:
+        _LOGGER.warning("Food name index build failed: %s", build.exception())
+        return
+    index = build.result()
+    if _name_index is None or _name_index.snapshot.version <= index.snapshot.version:
+        _name_index = index
+
+
+async def get_food_name_index(snapshot: CatalogSnapshot) -> FoodNameIndex:
+    """Index for ``snapshot``, rebuilt whenever the catalog snapshot changes.
+
+    Rebuilds run once per snapshot on the default executor. Until a rebuild
+    finishes the previous index is returned, so callers must resolve rows
+    through the returned index's ``snapshot``; only the very first build is
+    awaited.
+    """
+    global _pending
+    current = _name_index
+    if current is not None and current.snapshot is snapshot:
+        return current
+    if _pending is None or _pending[0] is not snapshot:
+        build = asyncio.get_running_loop().run_in_executor(None, FoodNameIndex, snapshot)
+        build.add_done_callback(_install_index)
+        _pending = (snapshot, build)
+    if current is not None:
+        return current
+    # Shielded so a cancelled request does not cancel the build other requests wait on.
+    return await asyncio.shield(_pending[1])
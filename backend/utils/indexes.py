@@ -0,0 +1,205 @@
+import argparse
+import asyncio
+import logging
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+if __package__ in (None, ""):
+    # Allow `python utils/indexes.py` from the backend directory.
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database import close_mongo_connection, connect_to_mongo, get_database
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    collection: str
+    keys: Tuple[Tuple[str, int], ...]
+    name: str
+    unique: bool = False
+    sparse: bool = False
+    # Name of an older index on the same keys that this one supersedes.
+    replaces: Optional[str] = None
+
+    def model(self) -> IndexModel:
+        return IndexModel(list(self.keys), name=self.name, unique=self.unique, sparse=self.sparse)
+
+
+@dataclass(frozen=True)
+class QueryShape:
+    """A query the application issues, with placeholder values, for ``explain()`` checks."""
+
+    name: str
+    collection: str
+    filter: Dict[str, Any]
+    sort: Optional[Tuple[Tuple[str, int], ...]] = None
+    projection: Optional[Dict[str, Any]] = None
+    limit: int = 0
+
+
+INDEXES: List[IndexSpec] = [
+    IndexSpec("users", (("email", ASCENDING),), "email_unique", unique=True),
+    # One current plan per user; save_plan upserts on it.
+    IndexSpec("mealplans", (("userId", ASCENDING),), "userId_unique", unique=True, replaces="userId"),
+    # Plan history pages are read newest-first per user; seq is unique per user.
+    IndexSpec("mealplan_history", (("userId", ASCENDING), ("seq", DESCENDING)), "userId_seq_unique", unique=True),
+    # Chatbot suggestions sort on one nutrient and read only the name, so
+    # these are covering indexes for those queries.
+    IndexSpec("foods", (("protein", DESCENDING), ("food", ASCENDING)), "protein_desc_food"),
+    IndexSpec("foods", (("calories", ASCENDING), ("food", ASCENDING)), "calories_food"),
+    # Upsert key for foods ingested from FoodData Central; synthetic foods have no fdcId.
+    IndexSpec("foods", (("fdcId", ASCENDING),), "fdcId_unique", unique=True, sparse=True),
+    # Upsert key for seeded foods (diet type, meal types and name).
+    IndexSpec("foods", (("seedKey", ASCENDING),), "seedKey_unique", unique=True, sparse=True),
+]
+
+QUERY_SHAPES: List[QueryShape] = [
+    QueryShape("login/register by email", "users", {"email": "probe@example.com"}),
+    QueryShape("meal plan by user", "mealplans", {"userId": ObjectId()}),
+    QueryShape(
+        "meal plan history page",
+        "mealplan_history",
+        {"userId": ObjectId(), "seq": {"$lt": 100}},
+        sort=(("seq", DESCENDING),),
+        projection={"_id": 0, "seq": 1, "createdAt": 1, "averageCalories": 1, "macros": 1},
+        limit=10,
+    ),
+    QueryShape(
+        "chatbot high-protein suggestions",
+        "foods",
+        {"protein": {"$gte": 20}},
+        sort=(("protein", DESCENDING),),
+        projection={"food": 1, "_id": 0},
+        limit=3,
+    ),
+    QueryShape(
+        "chatbot weight-gain suggestions",
+        "foods",
+        {"calories": {"$gte": 450}},
+        sort=(("calories", DESCENDING),),
+        projection={"food": 1, "_id": 0},
+        limit=3,
+    ),
+    QueryShape(
+        "chatbot weight-loss suggestions",
+        "foods",
+        {"calories": {"$lte": 350}},
+        sort=(("calories", ASCENDING),),
+        projection={"food": 1, "_id": 0},
+        limit=3,
+    ),
+]
+
+
+class QueryPlanError(RuntimeError):
+    """Raised when a known query shape would be answered by a collection scan."""
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase, specs: Optional[List[IndexSpec]] = None) -> List[str]:
+    """Create every index in ``specs``; existing identical indexes are left untouched.
+
+    A failure on one collection (for example duplicate emails blocking the
+    unique index) is logged and does not stop the others from being built.
+    """
+    by_collection: Dict[str, List[IndexSpec]] = {}
+    for spec in specs if specs is not None else INDEXES:
+        by_collection.setdefault(spec.collection, []).append(spec)
+
+    created: List[str] = []
+    for collection, items in by_collection.items():
+        replaced = await _drop_replaced(db, collection, items)
+        try:
+            names = await db[collection].create_indexes([spec.model() for spec in items])
+        except OperationFailure as exc:
+            _LOGGER.error("Could not create indexes on %s: %s", collection, exc)
+            if replaced:
+                # Keep the collection indexed on the old definitions until the conflict is resolved.
+                previous = [IndexModel(list(spec.keys), name=spec.replaces) for spec in replaced]
+                await db[collection].create_indexes(previous)
+            continue
+        created.extend(f"{collection}.{name}" for name in names)
+    _LOGGER.info("Indexes ensured: %s", ", ".join(created) or "none")
+    return created
+
+
+async def _drop_replaced(db: AsyncIOMotorDatabase, collection: str, specs: List[IndexSpec]) -> List[IndexSpec]:
+    """Drop the older indexes ``specs`` replace; MongoDB rejects a second index on the same keys."""
+    existing = await db[collection].index_information()
+    replaced = [spec for spec in specs if spec.replaces and spec.replaces in existing and spec.name not in existing]
+    for spec in replaced:
+        _LOGGER.info("Replacing index %s.%s with %s", collection, spec.replaces, spec.name)
+        await db[collection].drop_index(spec.replaces)
+    return replaced
+
+
+def _plan_stages(plan: Any) -> Iterator[str]:
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _plan_stages(item)
+
+
+async def explain_query_shapes(
+    db: AsyncIOMotorDatabase, shapes: Optional[List[QueryShape]] = None
+) -> Dict[str, List[str]]:
+    """Winning-plan stages for each query shape, keyed by shape name."""
+    plans: Dict[str, List[str]] = {}
+    for shape in shapes if shapes is not None else QUERY_SHAPES:
+        cursor = db[shape.collection].find(shape.filter, shape.projection)
+        if shape.sort:
+            cursor = cursor.sort(list(shape.sort))
+        if shape.limit:
+            cursor = cursor.limit(shape.limit)
+        explanation = await cursor.explain()
+        plans[shape.name] = list(_plan_stages(explanation.get("queryPlanner", {}).get("winningPlan", {})))
+    return plans
+
+
+async def check_query_plans(
+    db: AsyncIOMotorDatabase, shapes: Optional[List[QueryShape]] = None
+) -> Dict[str, List[str]]:
+    """Explain every query shape and raise ``QueryPlanError`` if any would scan a collection."""
+    plans = await explain_query_shapes(db, shapes)
+    scans = [name for name, stages in plans.items() if "COLLSCAN" in stages]
+    for name, stages in plans.items():
+        _LOGGER.info("Query plan for %s: %s", name, " <- ".join(stages))
+    if scans:
+        raise QueryPlanError(f"Collection scan in query plan for: {', '.join(scans)}")
+    return plans
+
+
+async def _run_cli(explain: bool) -> None:
+    connect_to_mongo()
+    try:
+        db = get_database()
+        for name in await ensure_indexes(db):
+            print(f"✅ {name}")
+        if explain:
+            for name, stages in (await check_query_plans(db)).items():
+                print(f"✅ {name}: {' <- '.join(stages)}")
+    finally:
+        close_mongo_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create MongoDB indexes and verify query plans.")
+    parser.add_argument("--explain", action="store_true", help="Fail if any known query shape uses a COLLSCAN")
+    args = parser.parse_args()
+    try:
+        asyncio.run(_run_cli(args.explain))
+    except QueryPlanError as exc:
+        print(f"❌ {exc}")
+        sys.exit(1)
@@ -0,0 +1,168 @@
+import asyncio
+import importlib.util
+import json
+import logging
+import random
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+
+from utils.metrics import record_llm_call
+from utils.settings import Settings, get_settings
+
+_LOGGER = logging.getLogger(__name__)
+
+_RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class LLMStreamInterrupted(Exception):
+    """Raised when a Gemini stream fails after some events were already yielded."""
+
+
+def _http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+class LLMClient:
+    """Shared Gemini client with connection pooling, a concurrency cap and retries."""
+
+    def __init__(self, settings: Settings) -> None:
+        self.model = settings.gemini_model
+        self.api_key = settings.gemini_api_key
+        self.max_retries = settings.llm_max_retries
+        self.backoff_seconds = settings.llm_backoff_seconds
+        self._semaphore = asyncio.Semaphore(settings.llm_max_concurrency)
+        self._client = httpx.AsyncClient(
+            base_url=settings.gemini_api_root,
+            # In a header rather than the ``key`` query parameter, so it never appears in logged URLs.
+            headers={"x-goog-api-key": self.api_key},
+            http2=_http2_available(),
+            timeout=httpx.Timeout(settings.llm_timeout_seconds, connect=settings.llm_connect_timeout_seconds),
+            limits=httpx.Limits(
+                max_connections=settings.llm_max_concurrency,
+                max_keepalive_connections=settings.llm_max_concurrency,
+            ),
+        )
+
+    async def generate_content(
+        self, payload: Dict[str, Any], *, timeout: Optional[float] = None, caller: str = "other"
+    ) -> Optional[Dict[str, Any]]:
+        """POST ``payload`` to ``generateContent``; returns the decoded body or ``None`` on failure.
+
+        ``caller`` labels the call's latency and outcome in ``/metrics``.
+        """
+        endpoint = f"/models/{self.model}:generateContent"
+        request_timeout = httpx.USE_CLIENT_DEFAULT if timeout is None else timeout
+        started = time.perf_counter()
+        outcome = "cancelled"
+
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    async with self._semaphore:
+                        response = await self._client.post(endpoint, json=payload, timeout=request_timeout)
+                except httpx.HTTPError as exc:
+                    outcome = "transport_error"
+                    _LOGGER.warning("Gemini request failed (attempt %s): %s", attempt + 1, exc)
+                else:
+                    if response.status_code == 200:
+                        try:
+                            data = response.json()
+                        except ValueError as exc:
+                            outcome = "decode_error"
+                            _LOGGER.warning("Failed to decode Gemini response: %s", exc)
+                            return None
+                        outcome = "success"
+                        return data
+                    outcome = "http_error"
+                    _LOGGER.warning("Gemini API returned %s: %s", response.status_code, response.text)
+                    if response.status_code not in _RETRYABLE_STATUS:
+                        return None
+
+                if attempt < self.max_retries:
+                    # Full jitter keeps concurrent retries from synchronising.
+                    await asyncio.sleep(random.uniform(0, self.backoff_seconds * 2**attempt))
+
+            return None
+        finally:
+            record_llm_call(caller, "generateContent", outcome, time.perf_counter() - started)
+
+    async def stream_generate_content(
+        self, payload: Dict[str, Any], *, caller: str = "other"
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield decoded ``streamGenerateContent`` SSE events as they arrive.
+
+        Connection errors and retryable statuses are retried only until the
+        first event; a failure after that raises ``LLMStreamInterrupted`` so
+        callers can tell a truncated reply from a complete one. The recorded
+        latency covers the whole stream.
+        """
+        endpoint = f"/models/{self.model}:streamGenerateContent"
+        params = {"alt": "sse"}
+        started = time.perf_counter()
+        outcome = "cancelled"
+
+        try:
+            for attempt in range(self.max_retries + 1):
+                received = False
+                try:
+                    async with self._semaphore:
+                        async with self._client.stream("POST", endpoint, params=params, json=payload) as response:
+                            if response.status_code != 200:
+                                outcome = "http_error"
+                                body = await response.aread()
+                                _LOGGER.warning("Gemini stream returned %s: %s", response.status_code, body[:500])
+                                if response.status_code not in _RETRYABLE_STATUS:
+                                    return
+                            else:
+                                async for line in response.aiter_lines():
+                                    if not line.startswith("data:"):
+                                        continue
+                                    try:
+                                        event = json.loads(line[5:])
+                                    except ValueError:
+                                        _LOGGER.warning("Skipping undecodable Gemini stream event")
+                                        continue
+                                    received = True
+                                    yield event
+                                outcome = "success" if received else "decode_error"
+                                return
+                except httpx.HTTPError as exc:
+                    outcome = "transport_error"
+                    _LOGGER.warning("Gemini stream failed (attempt %s): %s", attempt + 1, exc)
+                    if received:
+                        raise LLMStreamInterrupted(str(exc)) from exc
+
+                if attempt < self.max_retries:
+                    await asyncio.sleep(random.uniform(0, self.backoff_seconds * 2**attempt))
+        finally:
+            record_llm_call(caller, "streamGenerateContent", outcome, time.perf_counter() - started)
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+_llm_client: Optional[LLMClient] = None
+
+
+def get_llm_client() -> Optional[LLMClient]:
+    """Return the shared client, or ``None`` when Gemini is not configured."""
+    global _llm_client
+    settings = get_settings()
+    if not settings.gemini_api_key or not settings.gemini_model:
+        return None
+    if _llm_client is None:
+        _llm_client = LLMClient(settings)
+    return _llm_client
+
+
+def start_llm_client() -> None:
+    get_llm_client()
+
+
+async def close_llm_client() -> None:
+    global _llm_client
+    client, _llm_client = _llm_client, None
+    if client is not None:
+        await client.close()
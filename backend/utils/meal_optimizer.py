@@ -0,0 +1,100 @@
+import random
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from utils.food_catalog import CatalogSnapshot
+
+# Relative weight of calories, protein, carbs and fat errors in the objective.
+_OBJECTIVE_WEIGHTS = np.array([0.4, 0.25, 0.15, 0.2])
+
+
+@dataclass(frozen=True)
+class OptimizerConfig:
+    beam_width: int = 8
+    max_items: int = 4
+    candidate_pool: int = 48
+    tolerance: float = 0.08
+
+
+class PlanDeadline:
+    """Wall-clock budget shared by every meal of one plan."""
+
+    def __init__(self, budget_ms: float) -> None:
+        self.expires_at = time.perf_counter() + budget_ms / 1000.0
+
+    def expired(self) -> bool:
+        return time.perf_counter() >= self.expires_at
+
+
+def meal_error(totals: np.ndarray, target: np.ndarray) -> np.ndarray:
+    """Weighted mean relative deviation of nutrient rows from ``target``."""
+    return (np.abs(totals - target) / target) @ _OBJECTIVE_WEIGHTS
+
+
+def optimize_meal(
+    snapshot: CatalogSnapshot,
+    candidates: np.ndarray,
+    used: np.ndarray,
+    target: np.ndarray,
+    *,
+    deadline: PlanDeadline,
+    config: OptimizerConfig = OptimizerConfig(),
+    rng: Optional[random.Random] = None,
+) -> Optional[np.ndarray]:
+    """Beam search for the item set whose calories and macros best match ``target``.
+
+    ``target`` is a calories/protein/carbs/fat vector in ``NUTRIENT_COLUMNS`` order.
+    Unused rows are preferred the same way as the greedy selector. Returns ``None``
+    when the deadline expires before any item set was scored, so callers can fall
+    back to the greedy path.
+    """
+    if candidates.size == 0 or deadline.expired():
+        return None
+
+    pool = candidates[~used[candidates]]
+    if pool.size == 0:
+        pool = candidates
+    if pool.size > config.candidate_pool:
+        pool = pool[(rng or random).sample(range(pool.size), config.candidate_pool)]
+
+    matrix = snapshot.nutrients[pool]
+    positions = np.arange(pool.size)
+    beam_items = [()]
+    beam_totals = np.zeros((1, matrix.shape[1]))
+    beam_last = np.array([-1])
+    best_items: tuple = ()
+    best_score = np.inf
+
+    for _depth in range(config.max_items):
+        if deadline.expired():
+            break
+
+        expanded = beam_totals[:, None, :] + matrix[None, :, :]
+        scores = meal_error(expanded, target)
+        # Only extend with later positions so each item set is generated once.
+        scores[positions[None, :] <= beam_last[:, None]] = np.inf
+
+        width = min(config.beam_width, scores.size)
+        flat = np.argpartition(scores, width - 1, axis=None)[:width]
+        flat = flat[np.isfinite(scores.flat[flat])]
+        if flat.size == 0:
+            break
+
+        beam_idx, cand_idx = np.unravel_index(flat, scores.shape)
+        top = int(np.argmin(scores.flat[flat]))
+        if scores.flat[flat[top]] < best_score:
+            best_score = float(scores.flat[flat[top]])
+            best_items = beam_items[beam_idx[top]] + (int(cand_idx[top]),)
+        if best_score <= config.tolerance:
+            break
+
+        beam_items = [beam_items[b] + (int(c),) for b, c in zip(beam_idx.tolist(), cand_idx.tolist())]
+        beam_totals = expanded[beam_idx, cand_idx]
+        beam_last = cand_idx
+
+    if not best_items:
+        return None
+    return pool[list(best_items)]
@@ -0,0 +1,217 @@
+import time
+from bisect import bisect_left
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Metric updates are plain in-place increments with no locks. Most happen on
+# the event loop thread; Mongo events arrive on driver threads, where the GIL
+# makes a lost increment possible but rare, which is fine for monitoring.
+
+LabelValues = Tuple[str, ...]
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MONGO_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+CPU_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# Route label for requests that matched no route, so unknown paths cannot grow the label set.
+UNMATCHED_ROUTE = "<unmatched>"
+_INF_LABEL = 'le="+Inf"'
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in list(self._values.items()):
+            yield f"{self.name}{_format_labels(self.label_names, labels)} {_format_number(value)}"
+
+
+class _HistogramChild:
+    __slots__ = ("counts", "total")
+
+    def __init__(self, size: int) -> None:
+        self.counts = [0] * size
+        self.total = 0.0
+
+
+class Histogram:
+    """Fixed-bucket histogram; each label set gets its bucket counts allocated once, on first use."""
+
+    def __init__(
+        self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = HTTP_BUCKETS
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._children: Dict[LabelValues, _HistogramChild] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        child = self._children.get(labels)
+        if child is None:
+            child = self._children.setdefault(labels, _HistogramChild(len(self.buckets) + 1))
+        # The last slot counts observations above the largest bound (+Inf).
+        child.counts[bisect_left(self.buckets, value)] += 1
+        child.total += value
+
+    def samples(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, child in list(self._children.items()):
+            counts = list(child.counts)
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                label_text = _format_labels(self.label_names, labels, f'le="{bound}"')
+                yield f"{self.name}_bucket{label_text} {cumulative}"
+            cumulative += counts[-1]
+            yield f"{self.name}_bucket{_format_labels(self.label_names, labels, _INF_LABEL)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.label_names, labels)} {_format_number(child.total)}"
+            yield f"{self.name}_count{_format_labels(self.label_names, labels)} {cumulative}"
+
+
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", ("method", "route"), HTTP_BUCKETS
+)
+MONGO_COMMANDS = Counter(
+    "mongodb_commands_total", "MongoDB commands by name, collection and outcome.", ("command", "collection", "outcome")
+)
+MONGO_LATENCY = Histogram(
+    "mongodb_command_duration_seconds",
+    "MongoDB command latency reported by the driver.",
+    ("command", "collection"),
+    MONGO_BUCKETS,
+)
+LLM_CALLS = Counter(
+    "gemini_requests_total", "Gemini calls by caller, endpoint and outcome.", ("caller", "endpoint", "outcome")
+)
+LLM_LATENCY = Histogram(
+    "gemini_request_duration_seconds",
+    "Gemini call latency including retries.",
+    ("caller", "endpoint"),
+    LLM_BUCKETS,
+)
+PLAN_CPU = Histogram(
+    "plan_generation_cpu_seconds", "CPU time spent building one meal plan.", ("kind",), CPU_BUCKETS
+)
+CHAT_CACHE_LOOKUPS = Counter("chat_cache_lookups_total", "Chat reply cache lookups by result.", ("result",))
+
+REGISTRY: List[object] = [
+    HTTP_REQUESTS,
+    HTTP_LATENCY,
+    MONGO_COMMANDS,
+    MONGO_LATENCY,
+    LLM_CALLS,
+    LLM_LATENCY,
+    PLAN_CPU,
+    CHAT_CACHE_LOOKUPS,
+]
+
+
+def render_metrics() -> str:
+    """Every registered metric in the Prometheus text exposition format."""
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware counting requests and observing latency per route template."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter_ns()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get("route"), "path", None) or UNMATCHED_ROUTE
+            HTTP_REQUESTS.inc(scope["method"], route, str(status_code))
+            HTTP_LATENCY.observe((time.perf_counter_ns() - started) / 1e9, scope["method"], route)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """PyMongo command listener recording per-command latency and outcome."""
+
+    def __init__(self) -> None:
+        self._collections: Dict[Tuple[int, object], str] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        # Most commands name their collection under the command name; getMore has the cursor id there.
+        field = "collection" if event.command_name == "getMore" else event.command_name
+        collection = event.command.get(field)
+        if isinstance(collection, str):
+            self._collections[(event.request_id, event.connection_id)] = collection
+
+    def _finish(self, event, outcome: str) -> None:
+        collection = self._collections.pop((event.request_id, event.connection_id), "")
+        MONGO_COMMANDS.inc(event.command_name, collection, outcome)
+        MONGO_LATENCY.observe(event.duration_micros / 1e6, event.command_name, collection)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finish(event, "success")
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finish(event, "failure")
+
+
+def record_llm_call(caller: str, endpoint: str, outcome: str, seconds: float) -> None:
+    LLM_CALLS.inc(caller, endpoint, outcome)
+    LLM_LATENCY.observe(seconds, caller, endpoint)
+
+
+class PlanCpuTimer:
+    """Context manager observing the calling thread's CPU time into ``plan_generation_cpu_seconds``."""
+
+    def __init__(self, kind: str) -> None:
+        self.kind = kind
+        self._started: Optional[int] = None
+
+    def __enter__(self) -> "PlanCpuTimer":
+        self._started = time.thread_time_ns()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        PLAN_CPU.observe((time.thread_time_ns() - self._started) / 1e9, self.kind)
@@ -0,0 +1,147 @@
+import argparse
+import asyncio
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import bson
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+
+if __package__ in (None, ""):
+    # Allow `python utils/migrate_plans.py` from the backend directory.
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database import close_mongo_connection, connect_to_mongo, get_database
+from utils.food_catalog import CatalogSnapshot, get_food_catalog
+from utils.plan_store import FORMAT_REFS, HISTORY_COLLECTION, PLANS_COLLECTION, encode_refs, load_week
+from utils.settings import get_settings
+
+
+@dataclass
+class MigrationResult:
+    collection: str
+    scanned: int = 0
+    migrated: int = 0
+    skipped: int = 0
+    bytes_before: int = 0
+    bytes_after: int = 0
+
+    @property
+    def saved_ratio(self) -> float:
+        return round(1 - self.bytes_after / self.bytes_before, 4) if self.bytes_before else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "saved_ratio": self.saved_ratio}
+
+
+def _rows_by_name(snapshot: CatalogSnapshot) -> Dict[str, Optional[int]]:
+    # Legacy entries carry only a name; names shared by several foods cannot be resolved.
+    rows: Dict[str, Optional[int]] = {}
+    for row, name in enumerate(snapshot.names):
+        rows[name] = None if name in rows else row
+    return rows
+
+
+def _with_food_ids(
+    week: List[Dict[str, Any]], snapshot: CatalogSnapshot, rows_by_name: Dict[str, Optional[int]]
+) -> List[Dict[str, Any]]:
+    resolved = []
+    for day in week:
+        meals = {}
+        for meal, entries in day["meals"].items():
+            meals[meal] = []
+            for entry in entries:
+                food_id = entry.get("foodId")
+                if not food_id:
+                    row = rows_by_name.get(entry["name"])
+                    food_id = snapshot.ids[row] if row is not None else None
+                meals[meal].append({**entry, "foodId": food_id})
+        resolved.append({**day, "meals": meals})
+    return resolved
+
+
+async def migrate_collection(
+    db: AsyncIOMotorDatabase,
+    collection: str,
+    snapshot: CatalogSnapshot,
+    *,
+    dry_run: bool = False,
+    batch_size: Optional[int] = None,
+) -> MigrationResult:
+    """Re-encode every plan in ``collection`` that is not stored as food-id references yet.
+
+    Plans with an item that cannot be matched to exactly one catalog food are
+    left as they are. Current plans are only rewritten if they were not
+    regenerated in the meantime.
+    """
+    batch_size = batch_size or get_settings().batch_write_size
+    rows_by_name = _rows_by_name(snapshot)
+    result = MigrationResult(collection)
+    operations: List[UpdateOne] = []
+
+    async for doc in db[collection].find({"format": {"$ne": FORMAT_REFS}}):
+        result.scanned += 1
+        days = encode_refs(_with_food_ids(await load_week(db, doc), snapshot, rows_by_name))
+        if days is None:
+            result.skipped += 1
+            continue
+
+        migrated = {key: value for key, value in doc.items() if key != "week"}
+        migrated.update(days=days, format=FORMAT_REFS)
+        result.migrated += 1
+        result.bytes_before += len(bson.encode(doc))
+        result.bytes_after += len(bson.encode(migrated))
+
+        query = {"_id": doc["_id"]}
+        if collection == PLANS_COLLECTION:
+            query["createdAt"] = doc.get("createdAt")
+        operations.append(UpdateOne(query, {"$set": {"days": days, "format": FORMAT_REFS}, "$unset": {"week": ""}}))
+        if len(operations) >= batch_size:
+            if not dry_run:
+                await db[collection].bulk_write(operations, ordered=False)
+            operations = []
+
+    if operations and not dry_run:
+        await db[collection].bulk_write(operations, ordered=False)
+    return result
+
+
+async def migrate_plans(db: AsyncIOMotorDatabase, *, dry_run: bool = False) -> List[MigrationResult]:
+    snapshot = await get_food_catalog().get(db["foods"])
+    return [
+        await migrate_collection(db, collection, snapshot, dry_run=dry_run)
+        for collection in (PLANS_COLLECTION, HISTORY_COLLECTION)
+    ]
+
+
+def _mib(size: int) -> str:
+    return f"{size / 1024 / 1024:.2f} MiB"
+
+
+async def _run_cli(dry_run: bool) -> None:
+    connect_to_mongo()
+    started = time.perf_counter()
+    try:
+        results = await migrate_plans(get_database(), dry_run=dry_run)
+    finally:
+        close_mongo_connection()
+    verb = "would migrate" if dry_run else "migrated"
+    for result in results:
+        print(
+            f"✅ {result.collection}: {verb} {result.migrated} of {result.scanned} plans "
+            f"({result.skipped} skipped), {_mib(result.bytes_before)} → {_mib(result.bytes_after)} "
+            f"({result.saved_ratio:.0%} smaller)"
+        )
+        if result.skipped:
+            print(f"⚠️ {result.skipped} {result.collection} plans reference foods missing from the catalog")
+    print(f"Finished in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Store existing meal plans as catalog food references.")
+    parser.add_argument("--dry-run", action="store_true", help="Only measure the storage before and after")
+    args = parser.parse_args()
+    asyncio.run(_run_cli(args.dry_run))
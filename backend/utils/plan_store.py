@@ -0,0 +1,301 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import DESCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from utils.diet_generator import _compute_macro_totals
+from utils.food_catalog import CatalogSnapshot, get_food_catalog
+from utils.portion_engine import PortionTable, get_portion_table, scale_rows, scaled_entries
+from utils.settings import get_settings
+
+PLANS_COLLECTION = "mealplans"
+HISTORY_COLLECTION = "mealplan_history"
+
+# Stored weeks live in ``days`` in one of two encodings, named by ``format``:
+# FORMAT_POSITIONAL keeps every meal item as a positional array of
+# _ENTRY_FIELDS (trailing empty fields dropped) and day macros in _MACROS
+# order; FORMAT_REFS keeps only ``[foodId, servings]`` per item and rebuilds
+# names, macros and day totals from the catalog on read. Documents without
+# ``format`` are legacy plans with the full ``week`` embedded.
+FORMAT_POSITIONAL = 1
+FORMAT_REFS = 2
+_ENTRY_FIELDS = ("name", "calories", "protein", "carbs", "fat", "servings", "grams", "portion")
+_MACROS = ("protein", "carbs", "fat")
+_SUMMARY_PROJECTION = {"_id": 0, "seq": 1, "createdAt": 1, "averageCalories": 1, "macros": 1}
+_UNAVAILABLE_FOOD = "Food no longer available"
+DUPLICATE_KEY = 11000
+
+
+def plan_timestamp() -> datetime:
+    """Current UTC time at BSON (millisecond) precision, so it compares equal after a round trip."""
+    now = datetime.now(tz=timezone.utc)
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
+def _trim(values: List[Any]) -> List[Any]:
+    while values and values[-1] is None:
+        values.pop()
+    return values
+
+
+def _compact_entry(entry: Dict[str, Any]) -> List[Any]:
+    return _trim([entry.get(field) for field in _ENTRY_FIELDS])
+
+
+def _food_ref(food_id: str) -> Any:
+    # ObjectIds take 12 bytes in BSON against 29 for their hex string.
+    return ObjectId(food_id) if ObjectId.is_valid(food_id) else food_id
+
+
+def encode_week(week: Sequence[Dict[str, Any]]) -> List[List[Any]]:
+    """Encode ``DailyMeals`` dicts as ``[day, totalCalories, macros, {meal: [entry, ...]}]`` arrays."""
+    return [
+        [
+            day["day"],
+            day["totalCalories"],
+            [day["macros"].get(macro, 0.0) for macro in _MACROS],
+            {meal: [_compact_entry(entry) for entry in entries] for meal, entries in day["meals"].items()},
+        ]
+        for day in week
+    ]
+
+
+def decode_week(days: Sequence[List[Any]]) -> List[Dict[str, Any]]:
+    """Inverse of ``encode_week``."""
+    return [
+        {
+            "day": day,
+            "meals": {
+                meal: [dict(zip(_ENTRY_FIELDS, values)) for values in entries] for meal, entries in meals.items()
+            },
+            "totalCalories": total_calories,
+            "macros": dict(zip(_MACROS, macros)),
+        }
+        for day, total_calories, macros, meals in days
+    ]
+
+
+def encode_refs(week: Sequence[Dict[str, Any]]) -> Optional[List[List[Any]]]:
+    """Encode ``DailyMeals`` dicts as ``[day, {meal: [[foodId, servings], ...]}]``.
+
+    ``servings`` is omitted for unscaled items. Returns ``None`` when an item
+    has no ``foodId`` and so cannot be rebuilt from the catalog.
+    """
+    days = []
+    for day in week:
+        meals = {}
+        for meal, entries in day["meals"].items():
+            if any(not entry.get("foodId") for entry in entries):
+                return None
+            meals[meal] = [_trim([_food_ref(entry["foodId"]), entry.get("servings")]) for entry in entries]
+        days.append([day["day"], meals])
+    return days
+
+
+def encode_days(week: Sequence[Dict[str, Any]]) -> Tuple[int, List[List[Any]]]:
+    """The most compact encoding ``week`` allows, with its format number."""
+    refs = encode_refs(week)
+    if refs is not None:
+        return FORMAT_REFS, refs
+    return FORMAT_POSITIONAL, encode_week(week)
+
+
+def _hydrate_meal(
+    snapshot: CatalogSnapshot, items: Sequence[List[Any]], portions: Optional[PortionTable]
+) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+    rows_by_id = snapshot.rows_by_id
+    rows, scales, missing = [], [], 0
+    for item in items:
+        row = rows_by_id.get(str(item[0]))
+        if row is None:
+            missing += 1
+            continue
+        rows.append(row)
+        scales.append(item[1] if len(item) > 1 else None)
+
+    selection = np.array(rows, dtype=np.int64)
+    if scales and all(scale is not None for scale in scales):
+        meal = scale_rows(snapshot, selection, np.array(scales, dtype=np.float64))
+        nutrients = meal.nutrients
+        entries = [entry.model_dump() for entry in scaled_entries(snapshot, meal, portions)]
+    else:
+        nutrients = snapshot.nutrients[selection]
+        entries = [snapshot.entries[row].model_dump() for row in rows]
+    # Foods deleted from the catalog since the plan was stored.
+    entries.extend({"name": _UNAVAILABLE_FOOD, "calories": 0} for _ in range(missing))
+    return entries, nutrients
+
+
+def hydrate_refs(snapshot: CatalogSnapshot, days: Sequence[List[Any]]) -> List[Dict[str, Any]]:
+    """Rebuild ``DailyMeals`` dicts from ``encode_refs`` output using the catalog snapshot."""
+    portions = get_portion_table() if snapshot.fdc_ids.any() else None
+    week = []
+    for day, meals in days:
+        hydrated, day_nutrients = {}, []
+        for meal, items in meals.items():
+            hydrated[meal], nutrients = _hydrate_meal(snapshot, items, portions)
+            day_nutrients.append(nutrients)
+        week.append(
+            {
+                "day": day,
+                "meals": hydrated,
+                "totalCalories": sum(entry["calories"] for entries in hydrated.values() for entry in entries),
+                "macros": _compute_macro_totals(np.concatenate(day_nutrients) if day_nutrients else np.empty((0, 4))),
+            }
+        )
+    return week
+
+
+async def load_week(db: AsyncIOMotorDatabase, doc: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """The week stored in a plan or history document, whatever its format."""
+    fmt = doc.get("format")
+    if fmt == FORMAT_REFS:
+        snapshot = await get_food_catalog().get(db["foods"])
+        return hydrate_refs(snapshot, doc["days"])
+    if fmt == FORMAT_POSITIONAL:
+        return decode_week(doc["days"])
+    return doc["week"]
+
+
+async def load_plan(db: AsyncIOMotorDatabase, doc: Dict[str, Any]) -> Dict[str, Any]:
+    """A current-plan document with ``week`` filled in, ready for ``MealPlanInDB``."""
+    return {**doc, "week": await load_week(db, doc)}
+
+
+def history_document(user_id: ObjectId, seq: int, week: Sequence[Dict[str, Any]], created_at: datetime) -> Dict:
+    """One append-only history entry: list-view summary fields plus the encoded week."""
+    count = max(len(week), 1)
+    fmt, days = encode_days(week)
+    return {
+        "userId": user_id,
+        "seq": seq,
+        "createdAt": created_at,
+        "format": fmt,
+        "averageCalories": int(round(sum(day["totalCalories"] for day in week) / count)),
+        "macros": {macro: round(sum(day["macros"].get(macro, 0.0) for day in week) / count, 2) for macro in _MACROS},
+        "days": days,
+    }
+
+
+def _current_plan_update(week: List[Dict[str, Any]], created_at: datetime) -> Dict[str, Any]:
+    # seq numbers the user's plans; it also keys their history entries.
+    fmt, days = encode_days(week)
+    return {
+        "$set": {"days": days, "format": fmt, "createdAt": created_at},
+        "$unset": {"week": ""},
+        "$inc": {"seq": 1},
+    }
+
+
+async def _append_history(db: AsyncIOMotorDatabase, entries: List[Dict[str, Any]]) -> None:
+    """Insert history entries and drop each user's entries beyond ``PLAN_HISTORY_LIMIT``."""
+    limit = get_settings().plan_history_limit
+    history = db[HISTORY_COLLECTION]
+    expired = [
+        {"userId": entry["userId"], "seq": {"$lte": entry["seq"] - limit}} for entry in entries if entry["seq"] > limit
+    ]
+    writes = [history.insert_many(entries, ordered=False)]
+    if expired:
+        writes.append(history.delete_many({"$or": expired}))
+    await asyncio.gather(*writes)
+
+
+async def save_plan(
+    db: AsyncIOMotorDatabase, user_id: ObjectId, week: List[Dict[str, Any]], *, created_at: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """Make ``week`` the user's current plan and append it to their history.
+
+    The current plan is replaced with one atomic upsert that also bumps the
+    user's plan sequence number and returns the stored document (pass it to
+    ``load_plan`` to read the week back). Two concurrent first plans for a
+    user race on the unique ``userId`` index; the loser retries once as an update.
+    """
+    created_at = created_at or plan_timestamp()
+    update = _current_plan_update(week, created_at)
+    for attempt in range(2):
+        try:
+            current = await db[PLANS_COLLECTION].find_one_and_update(
+                {"userId": user_id}, update, upsert=True, return_document=ReturnDocument.AFTER
+            )
+            break
+        except DuplicateKeyError:
+            # A concurrent first plan for this user won the insert; the retry updates it instead.
+            if attempt:
+                raise
+    if get_settings().plan_history_limit > 0:
+        await _append_history(db, [history_document(user_id, current["seq"], week, created_at)])
+    return current
+
+
+async def save_plans(db: AsyncIOMotorDatabase, plans: Sequence[Tuple[ObjectId, List[Dict[str, Any]]]]) -> int:
+    """Bulk version of ``save_plan`` for many users; returns the number of current plans written.
+
+    Sequence numbers are read back afterwards; a user whose plan was replaced
+    again in the meantime keeps that newer plan's history entry only.
+    """
+    if not plans:
+        return 0
+    created_at = plan_timestamp()
+    operations = [
+        UpdateOne({"userId": user_id}, _current_plan_update(week, created_at), upsert=True) for user_id, week in plans
+    ]
+    written = await _upsert_current_plans(db, operations)
+    if get_settings().plan_history_limit > 0:
+        weeks = dict(plans)
+        cursor = db[PLANS_COLLECTION].find(
+            {"userId": {"$in": list(weeks)}, "createdAt": created_at}, {"_id": 0, "userId": 1, "seq": 1}
+        )
+        entries = [
+            history_document(doc["userId"], doc["seq"], weeks[doc["userId"]], created_at) async for doc in cursor
+        ]
+        if entries:
+            await _append_history(db, entries)
+    return written
+
+
+async def _upsert_current_plans(db: AsyncIOMotorDatabase, operations: List[UpdateOne]) -> int:
+    """Run the upserts, retrying once those that lost a concurrent insert race; returns plans written."""
+    try:
+        write = await db[PLANS_COLLECTION].bulk_write(operations, ordered=False)
+        return write.upserted_count + write.matched_count
+    except BulkWriteError as exc:
+        details = exc.details
+        raced = [error["index"] for error in details["writeErrors"] if error["code"] == DUPLICATE_KEY]
+        if len(raced) < len(details["writeErrors"]):
+            raise
+        retry = await db[PLANS_COLLECTION].bulk_write([operations[index] for index in raced], ordered=False)
+        return details["nUpserted"] + details["nMatched"] + retry.upserted_count + retry.matched_count
+
+
+async def list_history(
+    db: AsyncIOMotorDatabase, user_id: ObjectId, *, limit: int, before: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Newest-first history summaries, without the stored weeks."""
+    query: Dict[str, Any] = {"userId": user_id}
+    if before is not None:
+        query["seq"] = {"$lt": before}
+    cursor = db[HISTORY_COLLECTION].find(query, _SUMMARY_PROJECTION).sort("seq", DESCENDING).limit(limit)
+    return [doc async for doc in cursor]
+
+
+async def get_history_entry(db: AsyncIOMotorDatabase, user_id: ObjectId, seq: int) -> Optional[Dict[str, Any]]:
+    doc = await db[HISTORY_COLLECTION].find_one(
+        {"userId": user_id, "seq": seq}, {"_id": 0, "seq": 1, "createdAt": 1, "format": 1, "days": 1}
+    )
+    if doc is None:
+        return None
+    return {"seq": doc["seq"], "createdAt": doc["createdAt"], "week": await load_week(db, doc)}
+
+
+async def delete_plans(db: AsyncIOMotorDatabase, user_id: ObjectId) -> int:
+    """Delete the user's current plan and plan history; returns the number of current plans removed."""
+    current, _history = await asyncio.gather(
+        db[PLANS_COLLECTION].delete_many({"userId": user_id}),
+        db[HISTORY_COLLECTION].delete_many({"userId": user_id}),
+    )
+    return current.deleted_count
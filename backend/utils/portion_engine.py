@@ -0,0 +1,157 @@
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional
+
+import numpy as np
+
+from models.mealplan_model import MealEntry
+from utils.fdc_tables import FdcSource, open_fdc_tables
+from utils.food_catalog import CatalogSnapshot
+
+_LOGGER = logging.getLogger(__name__)
+
+# Household amounts are rounded to the nearest quarter unit for display.
+_DISPLAY_STEP = 0.25
+
+
+class PortionTable:
+    """Household measures for FDC foods in CSR layout.
+
+    ``fdc_ids`` is sorted; the measures of ``fdc_ids[i]`` occupy
+    ``offsets[i]:offsets[i + 1]`` of the ``unit_grams`` and ``labels`` columns,
+    where ``unit_grams`` is the weight of one unit (e.g. one cup).
+    """
+
+    def __init__(self, fdc_ids: np.ndarray, offsets: np.ndarray, unit_grams: np.ndarray, labels: List[str]) -> None:
+        self.fdc_ids = fdc_ids
+        self.offsets = offsets
+        self.unit_grams = unit_grams
+        self.labels = labels
+
+    @classmethod
+    def from_source(cls, source: FdcSource) -> "PortionTable":
+        units = source.measure_units()
+        measures = []
+        for fdc_id, amount, unit_id, grams, modifier in source.portion_rows():
+            unit = units.get(str(unit_id), "")
+            if not grams or not amount or unit in ("", "undetermined"):
+                continue
+            label = f"{unit} {modifier}".strip()
+            measures.append((fdc_id, grams / amount, label))
+        measures.sort(key=lambda item: item[0])
+
+        ids = np.array([item[0] for item in measures], dtype=np.int64)
+        fdc_ids, starts = np.unique(ids, return_index=True)
+        offsets = np.append(starts, ids.size).astype(np.int64)
+        unit_grams = np.array([item[1] for item in measures], dtype=np.float64)
+        return cls(fdc_ids, offsets, unit_grams, [item[2] for item in measures])
+
+    def describe(self, fdc_id: int, grams: float) -> Optional[str]:
+        """``grams`` of the food in the household unit whose count is closest to one, e.g. ``"1.5 cup"``."""
+        position = int(np.searchsorted(self.fdc_ids, fdc_id))
+        if position >= self.fdc_ids.size or self.fdc_ids[position] != fdc_id or grams <= 0:
+            return None
+        start, end = self.offsets[position], self.offsets[position + 1]
+        counts = grams / self.unit_grams[start:end]
+        best = int(np.argmin(np.abs(np.log(counts))))
+        amount = max(_DISPLAY_STEP, round(counts[best] / _DISPLAY_STEP) * _DISPLAY_STEP)
+        return f"{amount:g} {self.labels[start + best]}"
+
+
+@lru_cache(maxsize=1)
+def get_portion_table() -> Optional[PortionTable]:
+    """Portion table from the FDC snapshot (or CSVs), or ``None`` when no FDC data is available."""
+    try:
+        return PortionTable.from_source(open_fdc_tables())
+    except (OSError, ValueError) as exc:
+        _LOGGER.warning("FDC portion data unavailable: %s", exc)
+        return None
+
+
+@dataclass
+class ScaledMeal:
+    """Catalog rows with a continuous serving multiplier each, their weights and the resulting nutrients.
+
+    ``grams`` is NaN for foods whose serving weight is unknown.
+    """
+
+    rows: np.ndarray
+    scales: np.ndarray
+    grams: np.ndarray
+    nutrients: np.ndarray
+
+    @property
+    def calories(self) -> np.ndarray:
+        return self.nutrients[:, 0]
+
+    def totals(self) -> np.ndarray:
+        return self.nutrients.sum(axis=0) if self.rows.size else np.zeros(self.nutrients.shape[1])
+
+
+def scale_meal(
+    snapshot: CatalogSnapshot,
+    selection: np.ndarray,
+    target_calories: float,
+    *,
+    min_scale: float,
+    max_scale: float,
+) -> ScaledMeal:
+    """Scale every item of ``selection`` by one factor so the meal lands on ``target_calories``.
+
+    A single factor keeps the meal's macro ratio; it is clamped to
+    ``[min_scale, max_scale]`` so portions stay realistic, in which case the
+    target is approached rather than met. The factor is rounded to the
+    hundredth shown as ``servings``, so a stored plan rebuilds exactly.
+    """
+    nutrients = snapshot.nutrients[selection]
+    current = float(nutrients[:, 0].sum()) if selection.size else 0.0
+    factor = round(float(np.clip(target_calories / current, min_scale, max_scale)), 2) if current > 0 else 1.0
+    return scale_rows(snapshot, selection, np.full(selection.size, factor))
+
+
+def scale_rows(snapshot: CatalogSnapshot, selection: np.ndarray, factors: np.ndarray) -> ScaledMeal:
+    """Weights and nutrients of ``selection`` at the given per-item serving multipliers."""
+    grams = snapshot.serving_grams[selection] * factors
+    scaled = snapshot.nutrients[selection] * factors[:, None]
+    weighed = ~np.isnan(grams)
+    if weighed.any():
+        # Foods with a known weight are costed from the per-gram table.
+        scaled[weighed] = snapshot.per_gram[selection[weighed]] * grams[weighed, None]
+    return ScaledMeal(rows=selection, scales=factors, grams=grams, nutrients=scaled)
+
+
+def _round_preserving_sum(values: np.ndarray) -> np.ndarray:
+    """Round to integers so that the rounded values add up to the rounded total."""
+    floors = np.floor(values)
+    shortfall = int(round(float(values.sum()))) - int(floors.sum())
+    if shortfall > 0:
+        floors[np.argsort(floors - values)[:shortfall]] += 1
+    return floors.astype(np.int64)
+
+
+def scaled_entries(
+    snapshot: CatalogSnapshot, meal: ScaledMeal, portions: Optional[PortionTable] = None
+) -> List[MealEntry]:
+    calories = _round_preserving_sum(meal.calories)
+    entries = []
+    for index, row in enumerate(meal.rows.tolist()):
+        grams = None if np.isnan(meal.grams[index]) else round(float(meal.grams[index]), 1)
+        portion = None
+        if grams is not None and portions is not None and snapshot.fdc_ids[row]:
+            portion = portions.describe(int(snapshot.fdc_ids[row]), grams)
+        _, protein, carbs, fat = meal.nutrients[index].tolist()
+        entries.append(
+            MealEntry.model_construct(
+                name=snapshot.names[row],
+                foodId=snapshot.ids[row],
+                calories=int(calories[index]),
+                protein=round(protein, 2),
+                carbs=round(carbs, 2),
+                fat=round(fat, 2),
+                servings=round(float(meal.scales[index]), 2),
+                grams=grams,
+                portion=portion,
+            )
+        )
+    return entries
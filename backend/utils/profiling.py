@@ -0,0 +1,292 @@
+import asyncio
+import contextvars
+import itertools
+import os
+import sys
+import threading
+import time
+import weakref
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from types import CodeType, FrameType
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from utils.dependencies import is_admin_key
+from utils.settings import get_settings
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+_ADMIN_KEY_HEADER = b"x-admin-key"
+
+# (qualified name, file, first line) of one Python frame.
+FrameKey = Tuple[str, str, int]
+Stack = Tuple[FrameKey, ...]
+
+IDLE_FRAME: FrameKey = ("<idle>", "", 0)
+_OTHER_TASK = "<task {}>"
+# Frames up to and including the loop's callback runner are the same for every sample.
+_LOOP_ENTRY = asyncio.events.Handle._run.__code__
+
+# The profile of the request whose context a task was created in. Tasks copy the
+# context of their creator, so this also reaches tasks spawned by the request.
+_PROFILED_REQUEST: contextvars.ContextVar[Optional["RequestProfile"]] = contextvars.ContextVar(
+    "profiled_request", default=None
+)
+# Tasks spawned while a profiled request ran (e.g. the task streaming a response body).
+_request_tasks: "weakref.WeakKeyDictionary[asyncio.Task, RequestProfile]" = weakref.WeakKeyDictionary()
+
+
+@dataclass
+class RequestProfile:
+    """Wall-clock samples of the event loop thread taken while one request was in flight.
+
+    Samples taken while the request's own task, or a task it spawned, was
+    running keep its stack; time spent in other tasks is grouped under ``<task name>`` and time with
+    nothing running (waiting on Mongo or Gemini) under ``<idle>``. Each stack
+    is weighted by the time since the previous sample.
+    """
+
+    id: str
+    method: str
+    path: str
+    started_at: datetime
+    interval_ms: float
+    route: Optional[str] = None
+    status: Optional[int] = None
+    duration_ms: float = 0.0
+    samples: int = 0
+    stacks: Dict[Stack, float] = field(default_factory=dict)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "startedAt": self.started_at,
+            "durationMs": round(self.duration_ms, 3),
+            "samples": self.samples,
+            "intervalMs": self.interval_ms,
+        }
+
+    def collapsed(self) -> str:
+        """Collapsed stacks (``root;...;leaf weight``) weighted in microseconds, for flamegraph tools."""
+        lines = []
+        for stack, seconds in sorted(self.stacks.items(), key=lambda item: -item[1]):
+            names = ";".join(_frame_label(frame) for frame in stack)
+            lines.append(f"{names} {max(1, round(seconds * 1e6))}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self) -> Dict[str, Any]:
+        """The profile as a speedscope ``sampled`` document (https://www.speedscope.app)."""
+        frame_index: Dict[FrameKey, int] = {}
+        frames: List[Dict[str, Any]] = []
+        samples: List[List[int]] = []
+        weights: List[float] = []
+        for stack, seconds in self.stacks.items():
+            indices = []
+            for frame in stack:
+                if frame not in frame_index:
+                    frame_index[frame] = len(frames)
+                    name, filename, line = frame
+                    frames.append({"name": name, "file": filename, "line": line} if filename else {"name": name})
+                indices.append(frame_index[frame])
+            samples.append(indices)
+            weights.append(round(seconds * 1000, 3))
+        name = f"{self.method} {self.route or self.path} ({self.id})"
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "smart-ai-diet-planner",
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": round(sum(weights), 3),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+        }
+
+
+def _frame_label(frame: FrameKey) -> str:
+    name, filename, line = frame
+    return f"{name} ({os.path.basename(filename)}:{line})" if filename else name
+
+
+def _frame_key(code: CodeType) -> FrameKey:
+    return (code.co_qualname, code.co_filename, code.co_firstlineno)
+
+
+def _task_stack(frame: Optional[FrameType]) -> Stack:
+    """Root-first stack of ``frame`` without the event loop frames above the running task."""
+    codes: List[CodeType] = []
+    while frame is not None:
+        if frame.f_code is _LOOP_ENTRY:
+            break
+        codes.append(frame.f_code)
+        frame = frame.f_back
+    return tuple(_frame_key(code) for code in reversed(codes))
+
+
+def _install_task_factory(loop: asyncio.AbstractEventLoop) -> None:
+    """Wrap the loop's task factory so tasks created under a profiled request are attributed to it.
+
+    Starlette streams response bodies from a child task, which a sampler
+    that only knows the request's own task would report as ``<task name>``.
+    """
+    previous = loop.get_task_factory()
+    if getattr(previous, "_attributes_request_tasks", False):
+        return
+
+    def factory(loop: asyncio.AbstractEventLoop, coro, **kwargs) -> asyncio.Future:
+        if previous is None:
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+        else:
+            task = previous(loop, coro, **kwargs)
+        context = kwargs.get("context")
+        profile = _PROFILED_REQUEST.get() if context is None else context.get(_PROFILED_REQUEST)
+        if profile is not None:
+            _request_tasks[task] = profile
+        return task
+
+    factory._attributes_request_tasks = True  # type: ignore[attr-defined]
+    loop.set_task_factory(factory)
+
+
+class _LoopSampler(threading.Thread):
+    """Background thread sampling the event loop thread's stack until stopped."""
+
+    def __init__(self, profile: RequestProfile, loop_thread: int, loop, task: Optional[asyncio.Task]) -> None:
+        super().__init__(name=f"profiler-{profile.id}", daemon=True)
+        self.profile = profile
+        self.loop_thread = loop_thread
+        self.loop = loop
+        self.task = task
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        interval = self.profile.interval_ms / 1000
+        stacks = self.profile.stacks
+        previous = time.perf_counter()
+        while not self._stopped.wait(interval):
+            frame = sys._current_frames().get(self.loop_thread)
+            running = asyncio.current_task(self.loop)
+            now = time.perf_counter()
+            if self._stopped.is_set():
+                # The loop thread is already waiting in stop(); that is not the request's time.
+                break
+            if running is None:
+                stack: Stack = (IDLE_FRAME,)
+            elif running is self.task or _request_tasks.get(running) is self.profile:
+                stack = _task_stack(frame)
+            else:
+                stack = ((_OTHER_TASK.format(running.get_name()), "", 0),)
+            # Under CPU-bound work the GIL delays samples, so weigh each by the real gap.
+            stacks[stack] = stacks.get(stack, 0.0) + (now - previous)
+            self.profile.samples += 1
+            previous = now
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+
+
+class ProfileStore:
+    """Ring buffer of the most recent request profiles."""
+
+    def __init__(self, size: int) -> None:
+        self._profiles: Deque[RequestProfile] = deque(maxlen=size)
+        self._ids = itertools.count(1)
+
+    def new_id(self) -> str:
+        return str(next(self._ids))
+
+    def add(self, profile: RequestProfile) -> None:
+        self._profiles.append(profile)
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        for profile in self._profiles:
+            if profile.id == profile_id:
+                return profile
+        return None
+
+    def recent(self) -> List[RequestProfile]:
+        return list(reversed(self._profiles))
+
+
+_profile_store: Optional[ProfileStore] = None
+
+
+def get_profile_store() -> ProfileStore:
+    global _profile_store
+    if _profile_store is None:
+        _profile_store = ProfileStore(get_settings().profiling_buffer_size)
+    return _profile_store
+
+
+def _header(scope: Scope, name: bytes) -> Optional[str]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling requests sent with ``X-Profile: 1`` and a valid ``X-Admin-Key``.
+
+    Only registered when ``PROFILING_ENABLED`` is set. A profiled response
+    carries ``X-Profile-Id``, the key to fetch it from ``/admin/profiles``.
+    Sampling covers the whole response; tasks the request spawns, such as
+    the one streaming a response body, are sampled as part of it.
+    """
+
+    def __init__(self, app: ASGIApp, *, interval_ms: float = 1.0, store: Optional[ProfileStore] = None) -> None:
+        self.app = app
+        self.interval_ms = interval_ms
+        self.store = store or get_profile_store()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or _header(scope, PROFILE_HEADER) not in ("1", "true"):
+            await self.app(scope, receive, send)
+            return
+        if not is_admin_key(_header(scope, _ADMIN_KEY_HEADER)):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(
+            id=self.store.new_id(),
+            method=scope["method"],
+            path=scope["path"],
+            started_at=datetime.now(tz=timezone.utc),
+            interval_ms=self.interval_ms,
+        )
+
+        async def send_with_profile_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                message["headers"] = [*message.get("headers", []), (PROFILE_ID_HEADER, profile.id.encode("latin-1"))]
+            await send(message)
+
+        loop = asyncio.get_running_loop()
+        _install_task_factory(loop)
+        sampler = _LoopSampler(profile, threading.get_ident(), loop, asyncio.current_task())
+        token = _PROFILED_REQUEST.set(profile)
+        started = time.perf_counter_ns()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            sampler.stop()
+            _PROFILED_REQUEST.reset(token)
+            profile.duration_ms = (time.perf_counter_ns() - started) / 1_000_000
+            profile.route = getattr(scope.get("route"), "path", None)
+            self.store.add(profile)
@@ -0,0 +1,177 @@
+import json
+import logging
+import queue
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Iterable, Mapping, Optional, TextIO, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+REDACTED = "[redacted]"
+SENSITIVE_HEADERS = frozenset(
+    {"authorization", "proxy-authorization", "cookie", "set-cookie", "x-admin-key", "x-api-key"}
+)
+
+# Attributes every LogRecord has; anything else on a record came from ``extra``.
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+_TEXT_FORMAT = "%(levelname)s:%(name)s:%(message)s"
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional["DroppingQueueHandler"] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record; fields passed through ``extra`` become top-level keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                payload[key] = value
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """``QueueHandler`` that drops records instead of blocking or erroring when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging(
+    level: str = "INFO", log_format: str = "json", queue_size: int = 10000, stream: Optional[TextIO] = None
+) -> None:
+    """Route every log record through a bounded queue to a stream handler on a background thread.
+
+    Callers only format the message and enqueue the record; JSON encoding
+    and the write to ``stream`` (stdout by default) happen off the event loop.
+    """
+    global _listener, _queue_handler
+    stop_logging()
+
+    sink = logging.StreamHandler(stream or sys.stdout)
+    sink.setFormatter(JsonFormatter() if log_format == "json" else logging.Formatter(_TEXT_FORMAT))
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    _queue_handler = DroppingQueueHandler(log_queue)
+
+    root = logging.getLogger()
+    root.handlers = [_queue_handler]
+    root.setLevel(level.upper())
+    # httpx logs every request URL at INFO; keep only its warnings.
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    _listener = QueueListener(log_queue, sink, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the background writer."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def logging_stats() -> Dict[str, Any]:
+    if _queue_handler is None:
+        return {"enabled": False}
+    return {"queued": _queue_handler.queue.qsize(), "dropped": _queue_handler.dropped}
+
+
+def redact_headers(headers: Iterable[Tuple[bytes, bytes]]) -> Dict[str, str]:
+    """Decode raw ASGI headers, masking credentials and cookies."""
+    redacted = {}
+    for raw_name, raw_value in headers:
+        name = raw_name.decode("latin-1").lower()
+        redacted[name] = REDACTED if name in SENSITIVE_HEADERS else raw_value.decode("latin-1")
+    return redacted
+
+
+class RequestLogMiddleware:
+    """ASGI middleware writing one structured record per sampled HTTP request.
+
+    Successful responses are sampled at the rate configured for their route
+    template (e.g. ``/diet/{user_id}``) or, failing that, their status
+    class (``2xx``); error responses always use their status-class rate so
+    a quiet route cannot hide failures. Durations cover the whole response,
+    including streamed bodies.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        sample_rates: Mapping[str, float],
+        route_sample_rates: Optional[Mapping[str, float]] = None,
+        log_headers: bool = False,
+        logger_name: str = "request",
+    ) -> None:
+        self.app = app
+        self.sample_rates = dict(sample_rates)
+        self.route_sample_rates = dict(route_sample_rates or {})
+        self.log_headers = log_headers
+        self.logger = logging.getLogger(logger_name)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter_ns()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self._log(scope, status_code, time.perf_counter_ns() - started)
+
+    def _sample_rate(self, route: str, status_code: int) -> float:
+        status_class = f"{status_code // 100}xx"
+        if status_code < 400 and route in self.route_sample_rates:
+            return self.route_sample_rates[route]
+        return self.sample_rates.get(status_class, 1.0)
+
+    def _log(self, scope: Scope, status_code: int, duration_ns: int) -> None:
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        # The router stores the matched route in the scope; unmatched paths log as-is.
+        route = getattr(scope.get("route"), "path", None) or scope["path"]
+        rate = self._sample_rate(route, status_code)
+        if rate < 1.0 and random.random() >= rate:
+            return
+
+        duration_ms = duration_ns / 1_000_000
+        fields: Dict[str, Any] = {
+            "method": scope["method"],
+            "route": route,
+            "path": scope["path"],
+            "status": status_code,
+            "durationMs": round(duration_ms, 3),
+            "client": scope["client"][0] if scope.get("client") else None,
+            "sampleRate": rate,
+        }
+        if self.log_headers:
+            fields["headers"] = redact_headers(scope["headers"])
+        self.logger.info("%s %s %s %.1fms", scope["method"], route, status_code, duration_ms, extra=fields)
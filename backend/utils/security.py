@@ -1,7 +1,26 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
 from passlib.context import CryptContext
 
+from utils.settings import get_settings
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_in_flight = 0
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing pool already has its maximum number of queued jobs."""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__("Password hashing pool is saturated")
+        self.retry_after = retry_after
+
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -9,3 +28,53 @@ def hash_password(password: str) -> str:
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=get_settings().password_hash_workers,
+            thread_name_prefix="bcrypt",
+        )
+    return _executor
+
+
+async def _run_bounded(func: Callable[..., T], *args) -> T:
+    # bcrypt releases the GIL, so a small thread pool gives real parallelism
+    # without blocking the event loop. Jobs beyond workers + max_pending are
+    # rejected up front instead of queueing without limit.
+    global _in_flight
+    settings = get_settings()
+    if _in_flight >= settings.password_hash_workers + settings.password_hash_max_pending:
+        raise PasswordHasherBusy(settings.password_hash_retry_after_seconds)
+
+    _in_flight += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_executor(), func, *args)
+    finally:
+        _in_flight -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_bounded(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_bounded(verify_password, plain_password, hashed_password)
+
+
+def password_pool_stats() -> dict:
+    settings = get_settings()
+    return {
+        "inFlight": _in_flight,
+        "workers": settings.password_hash_workers,
+        "maxPending": settings.password_hash_max_pending,
+    }
+
+
+def shutdown_password_pool() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -1,12 +1,39 @@
+import argparse
+import math
+import multiprocessing
 import os
-from itertools import product
-from typing import Any, Dict, List, Optional
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from itertools import islice, product
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from dotenv import load_dotenv
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
+
+if __package__ in (None, ""):
+    # Allow `python utils/seed_data.py` from the backend directory.
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.food_catalog import bump_catalog_version, current_catalog_version
+from utils.indexes import INDEXES
+from utils.settings import get_settings
 
 TARGET_DATASET_SIZE = 500
 
+# ``source`` of the foods written by this seeder; other sources are left alone.
+SEED_SOURCE = "synthetic"
+STAGING_SUFFIX = "_staging"
+
+# Blueprint slices handed to each worker, and the catalog size below which
+# expansion stays in-process.
+_EXPAND_CHUNK_SIZE = 50_000
+_PARALLEL_EXPAND_THRESHOLD = 100_000
+# Least common period of the calorie, protein, carb and fat offsets in _nutrition_variation.
+_NUTRITION_PERIOD = 72
+
 CUISINES = [
     "Mediterranean",
     "Indian",
@@ -511,89 +538,249 @@ def _nutrition_variation(base: Dict[str, int], index: int, blueprint: Blueprint)
     }
 
 
-def _expand_blueprint(blueprint: Blueprint) -> List[Dict[str, Any]]:
+def _combinations(choices: List[List[str]], start: int) -> Iterator[Tuple[Tuple[str, ...], int]]:
+    """``itertools.product(*choices)`` from element ``start`` on, repeated forever, with the pass number."""
+    variation, offset = divmod(start, math.prod(len(options) for options in choices))
+    while True:
+        for combination in islice(product(*choices), offset, None):
+            yield combination, variation
+        variation, offset = variation + 1, 0
+
+
+def _expand_blueprint(blueprint: Blueprint, start: int = 0, stop: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Documents ``start:stop`` of a blueprint's name combinations (``stop`` defaults to its limit).
+
+    Slices can be expanded independently; past the end of the product,
+    names get a variation suffix.
+    """
     keys = list(blueprint["placeholders"].keys())
-    values_product = product(*(blueprint["placeholders"][key] for key in keys))
+    choices = [blueprint["placeholders"][key] for key in keys]
+    stop = blueprint["limit"] if stop is None else stop
+    # The nutrition offsets repeat every _NUTRITION_PERIOD indices.
+    nutrition_cycle = [_nutrition_variation(blueprint["base"], idx, blueprint) for idx in range(_NUTRITION_PERIOD)]
+    key_prefix = f"{blueprint['diet_type']}|{','.join(blueprint['meal_types'])}|"
     documents: List[Dict[str, Any]] = []
 
-    for idx, combination in enumerate(values_product):
-        if idx >= blueprint["limit"]:
-            break
-
-        context = dict(zip(keys, combination))
-        name = blueprint["name_pattern"].format(**context)
-        nutrition = _nutrition_variation(blueprint["base"], idx, blueprint)
+    combinations = _combinations(choices, start)
+    for idx, (combination, variation) in zip(range(start, stop), combinations):
+        name = blueprint["name_pattern"].format(**dict(zip(keys, combination)))
+        if variation:
+            name = f"{name} (Variation {variation + 1})"
 
         documents.append(
             {
                 "food": name,
-                "calories": nutrition["calories"],
-                "protein": nutrition["protein"],
-                "carbs": nutrition["carbs"],
-                "fat": nutrition["fat"],
+                **nutrition_cycle[idx % _NUTRITION_PERIOD],
                 "mealType": list(blueprint["meal_types"]),
                 "type": blueprint["diet_type"],
+                "seedKey": key_prefix + name,
             }
         )
 
     return documents
 
 
-def _generate_food_documents() -> List[Dict[str, Any]]:
-    documents: List[Dict[str, Any]] = []
-    for blueprint in BLUEPRINTS:
-        documents.extend(_expand_blueprint(blueprint))
+def _generate_food_documents(size: Optional[int] = None, workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Expand every blueprint, scaling the per-blueprint limits so the catalog has about ``size`` foods.
+
+    Large catalogs are expanded in slices across worker processes.
+    """
+    limits = [blueprint["limit"] for blueprint in BLUEPRINTS]
+    if size is not None:
+        base = sum(limits)
+        limits = [max(1, round(limit * size / base)) for limit in limits]
+    tasks = [
+        (blueprint, start, min(start + _EXPAND_CHUNK_SIZE, limit))
+        for blueprint, limit in zip(BLUEPRINTS, limits)
+        for start in range(0, limit, _EXPAND_CHUNK_SIZE)
+    ]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or sum(limits) < _PARALLEL_EXPAND_THRESHOLD:
+        chunks = [_expand_blueprint(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(tasks)), mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            chunks = list(pool.map(_expand_blueprint, *zip(*tasks)))
 
     unique_docs: List[Dict[str, Any]] = []
     seen = set()
-    for doc in documents:
-        key = (doc["food"], tuple(doc["mealType"]), doc["type"])
-        if key in seen:
-            continue
-        seen.add(key)
-        unique_docs.append(doc)
+    for chunk in chunks:
+        for doc in chunk:
+            if doc["seedKey"] in seen:
+                continue
+            seen.add(doc["seedKey"])
+            unique_docs.append(doc)
 
     return unique_docs
 
 
-def seed_foods() -> None:
-    load_dotenv()
-    mongo_uri = os.getenv("MONGO_URI")
-    if not mongo_uri:
-        raise RuntimeError("MONGO_URI environment variable is not set")
-
-    database_name = os.getenv("MONGO_DB_NAME", "aiplanner")
+def _seed_key(doc: Dict[str, Any]) -> str:
+    return doc.get("seedKey") or f"{doc['type']}|{','.join(doc['mealType'])}|{doc['food']}"
+
+
+class CatalogChangedError(RuntimeError):
+    """Raised when the live catalog was written to while a seed was being staged."""
+
+
+@dataclass
+class SeedResult:
+    documents: int = 0
+    carried_over: int = 0
+    inserted: int = 0
+    updated: int = 0
+    removed: int = 0
+    catalog_version: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def docs_per_second(self) -> float:
+        return round(self.documents / self.elapsed_seconds, 2) if self.elapsed_seconds else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "docs_per_second": self.docs_per_second}
+
+
+def seed_catalog(
+    db,
+    documents: Iterable[Dict[str, Any]],
+    *,
+    source: str = SEED_SOURCE,
+    collection_name: str = "foods",
+    batch_size: Optional[int] = None,
+) -> SeedResult:
+    """Replace the ``source`` foods of ``collection_name`` with ``documents``, using a synchronous PyMongo ``db``.
+
+    The whole live collection is copied into a staging collection, which gets
+    unordered bulk upserts keyed on ``seedKey``; foods of this source that
+    were not re-seeded are removed. Every other food (e.g. FoodData Central)
+    keeps its ``_id``, and foods from older seeders without ``source`` are
+    adopted by the matching seed document, so stored plans that reference
+    them stay valid. The staging collection then replaces the live one with
+    a single ``renameCollection`` and the catalog version is bumped, so
+    readers never see a partial catalog. If the catalog version moved while
+    staging, another writer changed the live collection and seeding stops
+    with ``CatalogChangedError`` instead of discarding its writes. Seeding
+    the same documents twice leaves the catalog unchanged.
+    """
+    batch_size = batch_size or get_settings().batch_write_size
+    started = time.perf_counter()
+    result = SeedResult()
+    live = db[collection_name]
+    staging_name = f"{collection_name}{STAGING_SUFFIX}"
+    staging = db[staging_name]
+
+    staging.drop()
+    version = current_catalog_version(db)
+    if collection_name in db.list_collection_names():
+        live.aggregate([{"$out": staging_name}])
+        result.carried_over = staging.count_documents({})
+        _adopt_legacy_foods(staging, batch_size)
+    staging.create_indexes([spec.model() for spec in INDEXES if spec.collection == "foods"])
+
+    run = datetime.now(tz=timezone.utc)
+    fresh = result.carried_over == 0
+    for batch in _batches(documents, batch_size):
+        result.documents += len(batch)
+        if fresh:
+            for doc in batch:
+                doc.update(source=source, seedKey=_seed_key(doc), seedRun=run, createdAt=run, updatedAt=run)
+            result.inserted += len(staging.insert_many(batch, ordered=False).inserted_ids)
+            continue
+        write = staging.bulk_write([_seed_upsert(doc, source, run) for doc in batch], ordered=False)
+        result.inserted += write.upserted_count
+        result.updated += write.matched_count
+    result.removed = staging.delete_many({"source": source, "seedRun": {"$ne": run}}).deleted_count
+
+    if current_catalog_version(db) != version:
+        staging.drop()
+        raise CatalogChangedError(f"{collection_name} changed while seeding; run the seed again")
+    staging.rename(collection_name, dropTarget=True)
+    result.catalog_version = bump_catalog_version(db)
+    result.elapsed_seconds = time.perf_counter() - started
+    return result
+
+
+def _adopt_legacy_foods(staging, batch_size: int) -> None:
+    """Give foods from older seeders (no ``source``) their ``seedKey``, so re-seeding updates them in place."""
+    legacy = {"source": {"$exists": False}, "seedKey": {"$exists": False}, "food": {"$exists": True}}
+    taken = set(staging.distinct("seedKey"))
+    operations: List[UpdateOne] = []
+    for doc in staging.find(legacy, {"food": 1, "type": 1, "mealType": 1}):
+        if "type" not in doc or "mealType" not in doc:
+            continue
+        key = _seed_key(doc)
+        if key in taken:
+            # seedKey is unique; duplicates stay as they are.
+            continue
+        taken.add(key)
+        operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"seedKey": key}}))
+        if len(operations) >= batch_size:
+            staging.bulk_write(operations, ordered=False)
+            operations = []
+    if operations:
+        staging.bulk_write(operations, ordered=False)
+
+
+def _seed_upsert(doc: Dict[str, Any], source: str, run: datetime) -> UpdateOne:
+    key = _seed_key(doc)
+    fields = {name: value for name, value in doc.items() if name != "_id"}
+    fields.update(source=source, seedKey=key, seedRun=run, updatedAt=run)
+    return UpdateOne({"seedKey": key}, {"$set": fields, "$setOnInsert": {"createdAt": run}}, upsert=True)
+
+
+def _batches(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    batch: List[Any] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def seed_foods(size: Optional[int] = None, workers: Optional[int] = None, force: bool = False) -> None:
+    settings = get_settings()
     collection_name = os.getenv("FOOD_COLLECTION_NAME", "foods")
+    target = size or TARGET_DATASET_SIZE
+    force = force or os.getenv("FORCE_REFRESH_FOODS", "false").lower() == "true"
 
-    documents = _generate_food_documents()
-    print(f"Generated {len(documents)} meal templates")
+    started = time.perf_counter()
+    documents = _generate_food_documents(size, workers)
+    print(f"Generated {len(documents)} meal templates in {time.perf_counter() - started:.2f}s")
 
-    force_refresh = os.getenv("FORCE_REFRESH_FOODS", "false").lower() == "true"
-
-    client = MongoClient(mongo_uri)
+    client = MongoClient(settings.mongo_uri)
     try:
-        db = client[database_name]
+        db = client[settings.mongo_db_name]
         collection = db[collection_name]
-        print(f"✅ Connected to MongoDB ({database_name}/{collection_name})")
+        print(f"✅ Connected to MongoDB ({settings.mongo_db_name}/{collection_name})")
 
-        existing = collection.count_documents({})
-        if existing >= TARGET_DATASET_SIZE and not force_refresh:
-            print(
-                f"Collection already contains {existing} items (>= {TARGET_DATASET_SIZE}). Skipping bulk insert."
-            )
+        existing = collection.count_documents({"source": SEED_SOURCE})
+        if existing >= target and not force:
+            print(f"Collection already contains {existing} seeded items (>= {target}). Skipping seed.")
             return
 
-        if existing:
-            reason = "force flag" if force_refresh else f"only {existing} items (< {TARGET_DATASET_SIZE})"
-            print(f"Refreshing collection because {reason}...")
-            collection.delete_many({})
-
-        result = collection.insert_many(documents)
-        print(f"✅ Inserted {len(result.inserted_ids)} foods successfully")
+        try:
+            result = seed_catalog(db, documents, collection_name=collection_name)
+        except CatalogChangedError as exc:
+            print(f"⚠️ {exc}")
+            sys.exit(1)
+        print(
+            f"✅ Seeded {result.documents} foods in {result.elapsed_seconds:.2f}s ({result.docs_per_second} docs/s): "
+            f"{result.inserted} inserted, {result.updated} updated, {result.removed} removed, "
+            f"{result.carried_over} carried over"
+        )
+        print(f"Catalog version bumped to {result.catalog_version}")
     finally:
         client.close()
 
 
 if __name__ == "__main__":
-    seed_foods()
-
+    parser = argparse.ArgumentParser(description="Seed the foods collection with synthetic meal templates.")
+    parser.add_argument("--size", type=int, default=None, help="Approximate number of foods to generate")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="Re-seed even if the catalog is already populated")
+    args = parser.parse_args()
+    seed_foods(args.size, args.workers, args.force)
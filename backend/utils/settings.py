@@ -1,4 +1,6 @@
 from functools import lru_cache
+from typing import Literal
+
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -6,11 +8,56 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 class Settings(BaseSettings):
     mongo_uri: str
     mongo_db_name: str = "smart_ai_diet"
+    mongo_ensure_indexes: bool = True
+    mongo_check_query_plans: bool = False
     jwt_secret_key: str = Field(..., alias="JWT_SECRET")
     jwt_algorithm: str = "HS256"
     access_token_expire_minutes: int = 60 * 24
     gemini_api_key: str | None = None
     gemini_model: str = "gemini-2.5-flash"
+    gemini_api_root: str = "https://generativelanguage.googleapis.com/v1"
+    llm_max_concurrency: int = 16
+    llm_timeout_seconds: float = 30.0
+    llm_connect_timeout_seconds: float = 5.0
+    llm_max_retries: int = 2
+    llm_backoff_seconds: float = 0.5
+    catalog_ttl_seconds: float = 300.0
+    catalog_change_stream: bool = True
+    plan_optimizer: Literal["greedy", "beam"] = "greedy"
+    plan_optimizer_budget_ms: float = 50.0
+    plan_description_concurrency: int = 7
+    plan_description_deadline_seconds: float = 12.0
+    deterministic_plans: bool = False
+    plan_cache_size: int = 2048
+    plan_cache_ttl_seconds: float = 3600.0
+    plan_portion_scaling: bool = False
+    plan_portion_min_scale: float = 0.5
+    plan_portion_max_scale: float = 2.0
+    user_cache_enabled: bool = True
+    user_cache_size: int = 10000
+    user_cache_ttl_seconds: float = 30.0
+    password_hash_workers: int = 4
+    password_hash_max_pending: int = 64
+    password_hash_retry_after_seconds: int = 1
+    chat_context_top_k: int = 12
+    chat_context_token_budget: int = 600
+    chat_cache_size: int = 5000
+    chat_cache_ttl_seconds: float = 3600.0
+    chat_cache_similarity: float = 0.85
+    admin_api_key: str | None = None
+    batch_workers: int | None = None
+    batch_write_size: int = 500
+    log_level: str = "INFO"
+    log_format: Literal["json", "text"] = "json"
+    log_queue_size: int = 10000
+    request_log_sample_rates: dict[str, float] = {"2xx": 1.0, "3xx": 1.0, "4xx": 1.0, "5xx": 1.0}
+    request_log_route_sample_rates: dict[str, float] = {}
+    request_log_headers: bool = False
+    plan_history_limit: int = 20
+    metrics_enabled: bool = True
+    profiling_enabled: bool = False
+    profiling_interval_ms: float = 1.0
+    profiling_buffer_size: int = 20
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", case_sensitive=False)
 
@@ -0,0 +1,221 @@
+import argparse
+import itertools
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, get_args
+
+import bson
+import numpy as np
+from bson import json_util
+from pymongo import MongoClient, UpdateOne
+
+if __package__ in (None, ""):
+    # Allow `python utils/synthetic_data.py` from the backend directory.
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from models.user_model import ActivityLevel, DietType, GenderType, GoalType
+from utils.seed_data import BLUEPRINTS, _batches, _combinations, seed_catalog
+from utils.security import hash_password
+from utils.settings import get_settings
+
+# ``source`` of generated foods, so a load-test catalog replaces only itself.
+SYNTHETIC_SOURCE = "loadtest"
+# Every generated user shares this password so login benchmarks can sign in.
+SYNTHETIC_PASSWORD = "loadtest-password"
+SYNTHETIC_EMAIL_DOMAIN = "loadtest.example.com"
+
+_CHUNK_SIZE = 50_000
+_JSON_OPTIONS = json_util.RELAXED_JSON_OPTIONS
+# The stdlib encoder with a BSON fallback is much faster than json_util.dumps for plain documents.
+_json_default = partial(json_util.default, json_options=_JSON_OPTIONS)
+
+# Mean share of calories from (protein, carbs, fat) per diet type.
+_ENERGY_SPLIT: Dict[str, Tuple[float, float, float]] = {
+    "balanced": (0.25, 0.50, 0.25),
+    "veg": (0.18, 0.55, 0.27),
+    "vegan": (0.16, 0.58, 0.26),
+    "non_veg": (0.32, 0.38, 0.30),
+    "keto": (0.22, 0.06, 0.72),
+    "paleo": (0.33, 0.22, 0.45),
+}
+# Higher values keep a food's split closer to its diet's mean.
+_SPLIT_CONCENTRATION = 40.0
+# Median calories and log-normal sigma of one serving, by the first meal type of a food.
+_SERVING_CALORIES: Dict[str, Tuple[float, float]] = {
+    "breakfast": (350.0, 0.25),
+    "lunch": (540.0, 0.25),
+    "dinner": (560.0, 0.25),
+    "snacks": (190.0, 0.35),
+}
+_CALORIES_PER_GRAM = np.array([4.0, 4.0, 9.0])
+
+
+def iter_synthetic_foods(size: int, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """Stream ``size`` foods with blueprint names and sampled macros.
+
+    Foods are spread over blueprints (diet and meal types) in proportion to
+    the seed catalog. Serving calories are log-normal per meal type and the
+    protein/carb/fat energy split is Dirichlet around the diet's mean, so
+    macros add up to the calories under the 4/4/9 factors. Macros are
+    sampled with NumPy one chunk at a time, so memory does not grow with
+    ``size``.
+    """
+    rng = np.random.default_rng(seed)
+    weights = np.array([blueprint["limit"] for blueprint in BLUEPRINTS], dtype=np.float64)
+    weights /= weights.sum()
+    names = []
+    for blueprint in BLUEPRINTS:
+        keys = list(blueprint["placeholders"].keys())
+        combinations = _combinations([blueprint["placeholders"][key] for key in keys], 0)
+        names.append((blueprint["name_pattern"], keys, combinations))
+    alphas = np.array([_ENERGY_SPLIT[blueprint["diet_type"]] for blueprint in BLUEPRINTS]) * _SPLIT_CONCENTRATION
+    medians = np.log([_SERVING_CALORIES[blueprint["meal_types"][0]][0] for blueprint in BLUEPRINTS])
+    sigmas = np.array([_SERVING_CALORIES[blueprint["meal_types"][0]][1] for blueprint in BLUEPRINTS])
+
+    for start in range(0, size, _CHUNK_SIZE):
+        count = min(_CHUNK_SIZE, size - start)
+        picks = rng.choice(len(BLUEPRINTS), size=count, p=weights)
+        calories = np.clip(np.rint(rng.lognormal(medians[picks], sigmas[picks])), 60, 1500)
+        # Dirichlet samples via normalised gamma draws, one alpha vector per row.
+        gammas = rng.gamma(alphas[picks])
+        grams = np.round(calories[:, None] * gammas / gammas.sum(axis=1, keepdims=True) / _CALORIES_PER_GRAM, 1)
+
+        for pick, kcal, (protein, carbs, fat) in zip(picks.tolist(), calories.tolist(), grams.tolist()):
+            blueprint = BLUEPRINTS[pick]
+            pattern, keys, combinations = names[pick]
+            combination, variation = next(combinations)
+            name = pattern.format(**dict(zip(keys, combination)))
+            if variation:
+                name = f"{name} (Variation {variation + 1})"
+            yield {
+                "food": name,
+                "calories": int(kcal),
+                "protein": protein,
+                "carbs": carbs,
+                "fat": fat,
+                "mealType": list(blueprint["meal_types"]),
+                "type": blueprint["diet_type"],
+            }
+
+
+def iter_synthetic_users(size: int, seed: int = 0, password_hash: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Stream ``size`` user documents cycling through every goal/activity/diet/gender combination.
+
+    Age, height and weight (from a sampled BMI) vary per user; all users
+    share the hash of ``SYNTHETIC_PASSWORD`` unless ``password_hash`` is given.
+    """
+    rng = np.random.default_rng(seed)
+    password_hash = password_hash or hash_password(SYNTHETIC_PASSWORD)
+    profiles = list(
+        itertools.product(get_args(GoalType), get_args(ActivityLevel), get_args(DietType), get_args(GenderType))
+    )
+    now = datetime.now(tz=timezone.utc)
+
+    for start in range(0, size, _CHUNK_SIZE):
+        count = min(_CHUNK_SIZE, size - start)
+        ages = rng.integers(18, 76, size=count)
+        heights = rng.normal(0.0, 7.0, size=count)
+        bmis = np.clip(rng.normal(25.0, 4.0, size=count), 16.0, 45.0)
+        for offset in range(count):
+            index = start + offset
+            goal, activity, diet, gender = profiles[index % len(profiles)]
+            height = round(float(np.clip((176.0 if gender == "male" else 163.0) + heights[offset], 140.0, 210.0)), 1)
+            yield {
+                "name": f"Load Test User {index}",
+                "email": f"user{index}@{SYNTHETIC_EMAIL_DOMAIN}",
+                "age": int(ages[offset]),
+                "height": height,
+                "weight": round(float(bmis[offset]) * (height / 100) ** 2, 1),
+                "goal": goal,
+                "activityLevel": activity,
+                "dietType": diet,
+                "gender": gender,
+                "password": password_hash,
+                "createdAt": now,
+            }
+
+
+def write_documents(path: Path, documents: Iterable[Dict[str, Any]]) -> int:
+    """Stream ``documents`` to ``path`` as JSON Lines (``.jsonl``) or concatenated BSON (``.bson``).
+
+    BSON files can be loaded with ``mongorestore`` or read back with
+    ``read_documents``.
+    """
+    count = 0
+    if path.suffix == ".bson":
+        with path.open("wb") as handle:
+            for doc in documents:
+                handle.write(bson.encode(doc))
+                count += 1
+    else:
+        with path.open("w", encoding="utf-8") as handle:
+            for doc in documents:
+                handle.write(json.dumps(doc, default=_json_default))
+                handle.write("\n")
+                count += 1
+    return count
+
+
+def read_documents(path: Path) -> Iterator[Dict[str, Any]]:
+    """Stream documents back from a file written by ``write_documents``."""
+    if path.suffix == ".bson":
+        with path.open("rb") as handle:
+            yield from bson.decode_file_iter(handle)
+    else:
+        with path.open("r", encoding="utf-8") as handle:
+            for line in handle:
+                if line.strip():
+                    yield json_util.loads(line, json_options=_JSON_OPTIONS)
+
+
+def write_users(db, users: Iterable[Dict[str, Any]], batch_size: Optional[int] = None) -> int:
+    """Upsert users keyed on ``email`` with unordered bulk writes; re-runs update in place."""
+    batch_size = batch_size or get_settings().batch_write_size
+    written = 0
+    for batch in _batches(users, batch_size):
+        write = db["users"].bulk_write(
+            [UpdateOne({"email": user["email"]}, {"$set": user}, upsert=True) for user in batch], ordered=False
+        )
+        written += write.upserted_count + write.matched_count
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a large synthetic catalog and user base for load tests.")
+    parser.add_argument("--foods", type=int, default=10_000, help="Number of foods (0 to skip)")
+    parser.add_argument("--users", type=int, default=1_000, help="Number of users (0 to skip)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out-dir", type=Path, default=None, help="Write files here instead of MongoDB")
+    parser.add_argument("--format", choices=["jsonl", "bson"], default="jsonl")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    foods = iter_synthetic_foods(args.foods, args.seed)
+    users = iter_synthetic_users(args.users, args.seed)
+
+    if args.out_dir is not None:
+        args.out_dir.mkdir(parents=True, exist_ok=True)
+        food_count = write_documents(args.out_dir / f"foods.{args.format}", foods) if args.foods else 0
+        user_count = write_documents(args.out_dir / f"users.{args.format}", users) if args.users else 0
+        target = str(args.out_dir)
+    else:
+        settings = get_settings()
+        client = MongoClient(settings.mongo_uri)
+        try:
+            db = client[settings.mongo_db_name]
+            food_count = seed_catalog(db, foods, source=SYNTHETIC_SOURCE).documents if args.foods else 0
+            user_count = write_users(db, users) if args.users else 0
+        finally:
+            client.close()
+        target = settings.mongo_db_name
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ Wrote {food_count} foods and {user_count} users to {target} in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()